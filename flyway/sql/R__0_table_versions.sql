@@ -0,0 +1,21 @@
+-- Generation counter per table, for ETags (GenericCrudRepository.table_version).
+-- Repeatable migrations run in description order, so this one precedes the
+-- schema files that attach the trigger.
+CREATE TABLE IF NOT EXISTS public.table_versions (
+  schema_name TEXT NOT NULL,
+  table_name TEXT NOT NULL,
+  version BIGINT NOT NULL DEFAULT 1,
+  PRIMARY KEY (schema_name, table_name)
+);
+
+-- Statement trigger: bumps the counter inside the writing transaction, so the
+-- new version commits (and replicates) together with the rows. Concurrent
+-- writers of one table queue on the counter row until they commit.
+CREATE OR REPLACE FUNCTION public.bump_table_version() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO public.table_versions AS v (schema_name, table_name)
+  VALUES (TG_TABLE_SCHEMA, TG_TABLE_NAME)
+  ON CONFLICT (schema_name, table_name) DO UPDATE SET version = v.version + 1;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
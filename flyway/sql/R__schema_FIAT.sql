@@ -6,3 +6,20 @@ CREATE TABLE IF NOT EXISTS fiat.nota_servico (
   descricao TEXT,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
+
+-- Keyset pagination seeks on (created_at, id): rows need a created_at, and the
+-- index serves every page as one range scan.
+UPDATE fiat.nota_servico SET created_at = NOW() WHERE created_at IS NULL;
+ALTER TABLE fiat.nota_servico ALTER COLUMN created_at SET NOT NULL;
+CREATE INDEX IF NOT EXISTS nota_servico_created_at_id_idx
+  ON fiat.nota_servico (created_at DESC, id DESC);
+
+-- ETag version: seeded so the table has an ETag before its first write; the
+-- trigger bumps it on every write statement.
+INSERT INTO public.table_versions (schema_name, table_name)
+  VALUES ('fiat', 'nota_servico')
+  ON CONFLICT DO NOTHING;
+DROP TRIGGER IF EXISTS nota_servico_version ON fiat.nota_servico;
+CREATE TRIGGER nota_servico_version
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON fiat.nota_servico
+  FOR EACH STATEMENT EXECUTE FUNCTION public.bump_table_version();
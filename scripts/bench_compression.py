@@ -0,0 +1,124 @@
+"""Benchmark: bytes on the wire and CPU per response for each compression setting.
+
+Builds ``/api/nota-servico`` bodies from synthetic ``nota_servico`` rows with
+the same encoders the API uses (``json`` page, ``columnar`` page, ``csv`` page
+and an NDJSON export), then compresses each with every available encoding.
+CPU is process time per response (median of ``--repeat`` runs); ``lambda``
+is the payload size after the base64 step ``serverless_wsgi`` applies to
+compressed bodies (6 MB limit).
+
+Usage:
+  python scripts/bench_compression.py [--rows 500] [--repeat 20] [--levels 1,5,9]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import sqlalchemy as sa  # noqa: E402
+
+from src.common import compression  # noqa: E402
+from src.common.export_formats import EXPORT_FORMATS, export_chunks, json_default  # noqa: E402
+from src.common.row_serializers import row_serializer  # noqa: E402
+from src.common.wire_formats import encode_columnar, encode_csv_page  # noqa: E402
+
+COLUMNS = ("id", "numero", "descricao", "valor", "tomador", "created_at")
+
+
+def _table() -> sa.Table:
+    return sa.Table(
+        "nota_servico",
+        sa.MetaData(),
+        sa.Column("id", sa.Uuid, primary_key=True),
+        sa.Column("numero", sa.BigInteger),
+        sa.Column("descricao", sa.Text),
+        sa.Column("valor", sa.Numeric(12, 2)),
+        sa.Column("tomador", sa.String(120)),
+        sa.Column("created_at", sa.DateTime),
+    )
+
+
+def _rows(count: int):
+    rnd = random.Random(42)
+    services = ["Consultoria", "Manutencao preventiva", "Licenciamento de software", "Suporte tecnico"]
+    base = datetime(2024, 1, 1)
+    return [
+        (
+            uuid.UUID(int=rnd.getrandbits(128)),
+            100000 + i,
+            f"{rnd.choice(services)} - contrato {rnd.randint(1000, 9999)}",
+            Decimal(rnd.randint(1000, 10000000)) / 100,
+            f"Cliente {rnd.randint(1, 200):03d} Ltda",
+            base + timedelta(minutes=i * 7),
+        )
+        for i in range(count)
+    ]
+
+
+def _bodies(rows):
+    meta = {"schema": "bench", "count": len(rows), "total": len(rows), "has_more": False, "limit": len(rows),
+            "offset": 0, "next_cursor": None}
+    items = row_serializer(_table()).many(rows)
+    _, ndjson = EXPORT_FORMATS["ndjson"]
+    return {
+        "json": json.dumps({**meta, "items": items}, default=json_default).encode("utf-8"),
+        "columnar": encode_columnar(meta, COLUMNS, rows)[0],
+        "csv": encode_csv_page(meta, COLUMNS, rows)[0],
+        "ndjson export": [c.encode("utf-8") for c in export_chunks(ndjson, COLUMNS, rows, rows_per_chunk=100)],
+    }
+
+
+def _cpu_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        samples.append((time.process_time() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--levels", default="", help="comma separated levels to try (default: configured level)")
+    args = parser.parse_args()
+    levels = [int(v) for v in args.levels.split(",") if v] or [None]
+
+    print(f"rows: {args.rows}  encodings: {', '.join(compression.available_encodings())}")
+    print(f"{'body':<14} {'encoding':<10} {'level':>5} {'bytes':>10} {'ratio':>7} {'lambda':>10} {'cpu ms':>8}")
+    for name, body in _bodies(_rows(args.rows)).items():
+        streamed = isinstance(body, list)
+        raw = sum(len(c) for c in body) if streamed else len(body)
+        print(f"{name:<14} {'identity':<10} {'':>5} {raw:>10,} {1:>7.1f} {raw:>10,} {0:>8.2f}")
+        for encoding in compression.available_encodings():
+            for level in levels:
+                if streamed:
+                    def run():
+                        return b"".join(compression.compress_chunks(body, encoding, level))
+                else:
+                    def run():
+                        return compression.compress(body, encoding, level)
+                out = run()
+                cpu = _cpu_ms(run, args.repeat)
+                shown = level if level is not None else compression.DEFAULT_LEVELS[encoding]
+                lambda_size = len(base64.b64encode(out))
+                print(f"{name:<14} {encoding:<10} {shown:>5} {len(out):>10,} {raw / len(out):>7.1f} "
+                      f"{lambda_size:>10,} {cpu:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""Load and latency benchmark: Lambda handlers and the ECS Flask app, end to end.
+
+Seeds a local database, then drives the real entrypoints in-process:
+
+- ``example_api``: ``example_api.handler`` with API Gateway events built by
+  ``src/tests/event_payload.set_up_api`` (REST payload, through
+  ``serverless_wsgi``); ``GET /api/nota-servico`` rotates over the tenant
+  schemas, authenticated by authorizer claims for ``--username``
+- ``print_lambda``: ``print_lambda.handler``
+- ``ecs``: the ECS Flask app (``src/app/ecs_service/app.py``) through its test
+  client: ``/health`` and the ``/api/nota-servico/export`` stream (with
+  ``ENABLE_AUTH=true``; the claims for ``--username`` ride in the environ as
+  API Gateway would pass them)
+
+Per scenario and concurrency level (threads): p50 / p95 / p99 latency,
+requests/s, status codes, SQL statements per request and the peak RSS of the
+process so far. Cold start (handler import + first request) is measured per
+target in fresh interpreters.
+
+Database: SQLite files under ``--db-dir`` by default (``main.db`` plus one
+attached file per tenant schema), or ``--db-url`` (PostgreSQL: the schemas are
+created). ``nota_servico`` tables are (re)seeded when their row count differs
+from ``--rows``; the user is created when missing (``models.schema_public``,
+stood in for by ``bench_models`` on a checkout without it).
+
+Results go to ``bench_results/handlers-<commit>.json`` (``--output``);
+``--compare`` prints the change against an earlier results file.
+
+Usage:
+  python scripts/bench_handlers.py [--tenants 3] [--rows 1000] [--desc-bytes 100]
+      [--requests 300] [--concurrency 1,4] [--cold-runs 3] [--limit 50]
+      [--targets example_api,print_lambda,ecs] [--db-dir .bench_db | --db-url URL]
+      [--username bench] [--output FILE] [--compare OLD.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import json
+import math
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import bench_models  # noqa: E402
+from src.tests.event_payload import set_up_api  # noqa: E402
+
+TARGETS = {
+    "example_api": "src.app.example_api.example_api",
+    "print_lambda": "src.app.print_lambda.print_lambda",
+    "ecs": "src.app.ecs_service.app",
+}
+
+_COLD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import bench_handlers as bench
+config = json.loads(sys.argv[2])
+bench.configure(config)
+module = importlib.import_module(bench.TARGETS[config["target"]])
+imported = time.perf_counter()
+status = bench.invoke(config["target"], module, config["request"])
+done = time.perf_counter()
+print(json.dumps({"init_ms": (imported - started) * 1000, "first_ms": (done - imported) * 1000,
+                  "status": status, "peak_rss_mb": bench.peak_rss_mb()}))
+"""
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *_args, **_kwargs) -> None:
+        with self._lock:
+            self.count += 1
+
+
+queries = _QueryCounter()
+
+
+# -----------------------------------------------------------------------------
+# Environment and database
+# -----------------------------------------------------------------------------
+
+def configure(config: Dict[str, Any]) -> None:
+    """Point the app at the bench database; call before importing any handler.
+
+    With ``needs_db`` false (cold start of a route without DB access), only the
+    environment is set, so SQLAlchemy is not imported ahead of the handler.
+    """
+    bench_models.install()
+    os.environ["DB_URL"] = config["db_url"]
+    # The ECS app serves tenant data only with auth on.
+    os.environ.setdefault("ENABLE_AUTH", "true")
+    os.environ.setdefault("METRICS_SINK", "none")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not config.get("needs_db", True):
+        return
+
+    import sqlalchemy as sa  # noqa: WPS433 (runtime import)
+
+    attachments = config.get("attach") or {}
+
+    def _attach(dbapi_connection, _record):
+        # Tenant schemas on SQLite are attached database files.
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            for schema, path in attachments.items():
+                dbapi_connection.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+
+    # On the Engine class: covers every engine the app creates (writer and reader).
+    sa.event.listen(sa.engine.Engine, "connect", _attach)
+    sa.event.listen(sa.engine.Engine, "before_cursor_execute", queries)
+
+
+def _nota_servico_table(metadata, schema: str):
+    import sqlalchemy as sa  # noqa: WPS433 (runtime import)
+
+    # Same shape as flyway/sql/R__schema_*.sql
+    return sa.Table(
+        "nota_servico",
+        metadata,
+        sa.Column("id", sa.Uuid, primary_key=True),
+        sa.Column("numero", sa.BigInteger),
+        sa.Column("descricao", sa.Text),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        schema=schema,
+    )
+
+
+def seed(db_url: str, schemas: List[str], rows: int, desc_bytes: int) -> None:
+    import sqlalchemy as sa  # noqa: WPS433 (runtime import)
+
+    engine = sa.create_engine(db_url)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    descricao = ("lorem ipsum " * (desc_bytes // 12 + 1))[:desc_bytes]
+    with engine.begin() as conn:
+        for schema in schemas:
+            if engine.dialect.name == "postgresql":
+                conn.execute(sa.text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+            table = _nota_servico_table(sa.MetaData(), schema)
+            table.create(conn, checkfirst=True)
+            if conn.execute(sa.select(sa.func.count()).select_from(table)).scalar_one() == rows:
+                continue
+            conn.execute(table.delete())
+            for first in range(0, rows, 1000):
+                conn.execute(
+                    table.insert(),
+                    [
+                        {"id": uuid.uuid4(), "numero": i, "descricao": f"{i} {descricao}",
+                         "created_at": started + timedelta(seconds=i)}
+                        for i in range(first, min(rows, first + 1000))
+                    ],
+                )
+            print(f"seeded {schema}.nota_servico: {rows} rows")
+    engine.dispose()
+
+
+def seed_user(db_url: str, username: str) -> None:
+    """Create an active user (and client) for the authenticated routes, if missing."""
+    import sqlalchemy as sa  # noqa: WPS433 (runtime import)
+    from sqlalchemy.orm import Session  # noqa: WPS433 (runtime import)
+    from models.schema_public import User  # noqa: WPS433 (runtime import)
+
+    Cliente = User.Cliente.property.mapper.class_
+    engine = sa.create_engine(db_url)
+    try:
+        User.metadata.create_all(engine, tables=[Cliente.__table__, User.__table__])
+        with Session(engine) as session, session.begin():
+            if session.query(User).filter(User.Username == username).first() is None:
+                cliente = Cliente(Ativo=True, Excluido=False)
+                session.add(User(Username=username, Ativo=True, Excluido=False, Cliente=cliente))
+                print(f"created user {username}")
+    except sa.exc.SQLAlchemyError as exc:
+        sys.exit(f"could not create user {username} ({exc}); pass an existing --username and --no-seed-user")
+    finally:
+        engine.dispose()
+
+
+# -----------------------------------------------------------------------------
+# Requests
+# -----------------------------------------------------------------------------
+
+def api_event(path: str, query: Optional[Dict[str, str]] = None, username: Optional[str] = None,
+              method: str = "GET", body: Optional[str] = None) -> Dict[str, Any]:
+    """``set_up_api`` event; with ``username``, carries API Gateway authorizer claims."""
+    event = set_up_api(path, method, query, body)
+    event["requestContext"]["httpMethod"] = method
+    if username:
+        event["requestContext"]["authorizer"] = {"jwt": {"claims": {"cognito:username": username}}}
+    return event
+
+
+_clients = threading.local()
+
+
+def invoke(target: str, module, request) -> int:
+    """Send one request (an event, or ``[path, username]`` for the ECS app); return the status."""
+    if target == "ecs":
+        client = getattr(_clients, "client", None)
+        if client is None:
+            client = _clients.client = module.app.test_client()
+        path, username = request
+        environ = {"serverless.event": api_event(path, username=username)} if username else None
+        response = client.get(path, environ_overrides=environ)
+        response.get_data()  # drain streamed bodies
+        return response.status_code
+    return module.handler(request, None)["statusCode"]
+
+
+def scenarios(args, schemas: List[str]) -> List[Dict[str, Any]]:
+    """name, target and request factory (called outside the timed section)."""
+    list_events = [
+        api_event("/api/nota-servico", {"schema": s, "limit": str(args.limit)}, args.username) for s in schemas
+    ]
+    health_event = api_event("/api/health")
+    print_event = api_event("/print", method="POST", body=json.dumps({"hello": "bench"}))
+    all_scenarios = [
+        {"name": "example_api list", "target": "example_api",
+         "request": lambda i: copy.deepcopy(list_events[i % len(list_events)])},
+        {"name": "example_api health", "target": "example_api", "request": lambda i: copy.deepcopy(health_event)},
+        {"name": "print_lambda", "target": "print_lambda", "request": lambda i: copy.deepcopy(print_event)},
+        {"name": "ecs health", "target": "ecs", "request": lambda i: ["/health", None]},
+        {"name": "ecs export", "target": "ecs",
+         "request": lambda i: [f"/api/nota-servico/export?schema={schemas[i % len(schemas)]}", args.username]},
+    ]
+    for scenario in all_scenarios:
+        scenario["needs_db"] = scenario["name"] in ("example_api list", "ecs export")
+    return [s for s in all_scenarios if s["target"] in args.targets]
+
+
+# -----------------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _percentile(samples: List[float], p: float) -> float:
+    return samples[max(0, min(len(samples) - 1, math.ceil(p / 100 * len(samples)) - 1))]
+
+
+def run(target: str, module, make_request: Callable[[int], Any], requests: int, concurrency: int) -> Dict[str, Any]:
+    def _worker(indices):
+        latencies, statuses = [], Counter()
+        for i in indices:
+            request = make_request(i)
+            started = time.perf_counter()
+            status = invoke(target, module, request)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+        return latencies, statuses
+
+    queries_before = queries.count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_worker, [range(w, requests, concurrency) for w in range(concurrency)]))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for worker_latencies, _ in results for ms in worker_latencies)
+    statuses = sum((s for _, s in results), Counter())
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "rps": requests / elapsed,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "errors": sum(v for k, v in statuses.items() if k >= 500),
+        "queries_per_request": (queries.count - queries_before) / requests,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def cold(config: Dict[str, Any], runs: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _COLD, os.path.join(ROOT, "scripts"), json.dumps(config)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            sys.exit(f"cold start of {config['target']} failed:\n{out.stderr[-4000:]}")
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    samples.sort(key=lambda s: s["init_ms"] + s["first_ms"])
+    return samples[len(samples) // 2]
+
+
+# -----------------------------------------------------------------------------
+# Results
+# -----------------------------------------------------------------------------
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _key(scenario: Dict[str, Any]) -> tuple:
+    return scenario["name"], scenario["concurrency"]
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    def _delta(before: float, after: float) -> str:
+        return f"{before:>9.2f} -> {after:>9.2f} ({(after - before) / before:+.0%})" if before else f"{after:>9.2f}"
+
+    print(f"\ncompare with {old.get('commit') or '?'}")
+    for target, result in new["cold"].items():
+        if target in old.get("cold", {}):
+            print(f"  cold {target:<22} init ms  {_delta(old['cold'][target]['init_ms'], result['init_ms'])}")
+    previous = {_key(s): s for s in old.get("scenarios", [])}
+    for scenario in new["scenarios"]:
+        before = previous.get(_key(scenario))
+        if before is None:
+            continue
+        label = f"{scenario['name']} x{scenario['concurrency']}"
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            print(f"  {label:<27} {metric:<7}  {_delta(before[metric], scenario[metric])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1000, help="nota_servico rows per tenant")
+    parser.add_argument("--desc-bytes", type=int, default=100, help="width of descricao")
+    parser.add_argument("--requests", type=int, default=300, help="per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,4")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--db-dir", default=os.path.join(ROOT, ".bench_db"))
+    parser.add_argument("--db-url", help="use this database (e.g. PostgreSQL) instead of SQLite files")
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--no-seed", action="store_true", help="use the database as it is")
+    parser.add_argument("--no-seed-user", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="earlier results file")
+    args = parser.parse_args()
+    args.targets = [t for t in args.targets.split(",") if t]
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    schemas = [f"tenant_{n}" for n in range(1, args.tenants + 1)]
+    attach: Dict[str, str] = {}
+    db_url = args.db_url
+    if not db_url:
+        os.makedirs(args.db_dir, exist_ok=True)
+        db_url = f"sqlite:///{os.path.join(args.db_dir, 'main.db')}"
+        attach = {s: os.path.join(args.db_dir, f"{s}.db") for s in schemas}
+    config = {"db_url": db_url, "attach": attach}
+    configure(config)
+
+    if not args.no_seed:
+        seed(db_url, schemas, args.rows, args.desc_bytes)
+        if not args.no_seed_user and {"example_api", "ecs"} & set(args.targets):
+            seed_user(db_url, args.username)
+
+    plan = scenarios(args, schemas)
+    results: Dict[str, Any] = {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "cold": {},
+        "scenarios": [],
+    }
+
+    print(f"cold start (median of {args.cold_runs})")
+    print(f"{'target':<14} {'init ms':>9} {'first ms':>9} {'status':>7} {'peak MB':>8}")
+    for target in args.targets:
+        first = next(s for s in plan if s["target"] == target)
+        r = results["cold"][target] = cold({**config, "target": target, "request": first["request"](0),
+                                            "needs_db": first["needs_db"]},
+                                           args.cold_runs)
+        print(f"{target:<14} {r['init_ms']:>9.1f} {r['first_ms']:>9.1f} {r['status']:>7} {r['peak_rss_mb']:>8.1f}")
+
+    import importlib  # noqa: WPS433 (runtime import)
+
+    modules = {target: importlib.import_module(TARGETS[target]) for target in args.targets}
+    print(f"\nwarm ({args.requests} requests per row)")
+    print(f"{'scenario':<20} {'conc':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} "
+          f"{'q/req':>6} {'peak MB':>8}  statuses")
+    for scenario in plan:
+        module = modules[scenario["target"]]
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            # print_lambda and the stdout metrics sink write to stdout on every call.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                run(scenario["target"], module, scenario["request"], min(20, args.requests), concurrency)
+                r = run(scenario["target"], module, scenario["request"], args.requests, concurrency)
+            results["scenarios"].append({"name": scenario["name"], "target": scenario["target"], **r})
+            print(f"{scenario['name']:<20} {concurrency:>4} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                  f"{r['p99_ms']:>8.2f} {r['rps']:>8.0f} {r['queries_per_request']:>6.2f} "
+                  f"{r['peak_rss_mb']:>8.1f}  {r['statuses']}")
+
+    output = args.output or os.path.join(
+        ROOT, "bench_results", f"handlers-{results['commit'] or 'unknown'}{'-dirty' if results['dirty'] else ''}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(f"\nresults written to {os.path.relpath(output, ROOT)}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Micro-benchmark: JWT verifications per second with and without the claims cache.
+
+Signs a few RS256 tokens with a throwaway key, serves its JWKS from memory
+instead of the Cognito URL, and times ``_verify_and_decode`` with the cache
+cleared before every call (cold: full signature check) and with the cache left
+warm (repeat calls from the same clients). ``models.schema_public`` (imported by
+``common.authorization``) is stood in for when absent (``bench_models``).
+
+Usage:
+  python scripts/bench_jwt_cache.py [--iterations 20000] [--tokens 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import bench_models  # noqa: E402
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jwt.algorithms import RSAAlgorithm  # noqa: E402
+
+ISSUER = "https://cognito-idp.local/bench"
+AUDIENCE = "bench-client"
+
+
+def _tokens(private_key, count: int):
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {"sub": f"user-{i}", "cognito:username": f"user-{i}", "iss": ISSUER, "aud": AUDIENCE,
+             "iat": now, "exp": now + 3600},
+            private_key,
+            algorithm="RS256",
+            headers={"kid": "bench"},
+        )
+        for i in range(count)
+    ]
+
+
+def _run(verify, tokens, iterations: int, before_each=None) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        if before_each is not None:
+            before_each()
+        verify(tokens[i % len(tokens)])
+    return iterations / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["COGNITO_ISSUER"] = ISSUER
+    os.environ["COGNITO_AUDIENCE"] = AUDIENCE
+
+    bench_models.install()
+    from src.common import authorization  # noqa: WPS433 (runtime import)
+    from src.common.jwks_store import JwksKeyStore  # noqa: WPS433 (runtime import)
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = {**json.loads(RSAAlgorithm.to_jwk(private_key.public_key())), "kid": "bench", "alg": "RS256", "use": "sig"}
+    jwks = JwksKeyStore(ISSUER, fetch=lambda: {"keys": [jwk]})
+    jwks.refresh()
+    authorization._jwks_client = lambda issuer: jwks
+    tokens = _tokens(private_key, args.tokens)
+
+    cold_iterations = max(args.iterations // 10, 100)
+    cold = _run(authorization._verify_and_decode, tokens, cold_iterations, authorization.clear_claims_cache)
+    authorization.clear_claims_cache()
+    warm = _run(authorization._verify_and_decode, tokens, args.iterations)
+
+    print(f"tokens: {args.tokens}")
+    print(f"uncached: {cold:>12,.0f} verifications/s  ({cold_iterations} iterations)")
+    print(f"cached:   {warm:>12,.0f} verifications/s  ({args.iterations} iterations)")
+    print(f"speedup:  {warm / cold:>12,.1f}x")
+    print(f"cache:    {authorization.claims_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
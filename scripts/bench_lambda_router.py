@@ -0,0 +1,146 @@
+"""Benchmark: Lambda fast-path router vs. the serverless_wsgi + Flask path.
+
+Cold start: each handler module is imported in a fresh interpreter and
+invoked once; reports the init (import) time, the first invocation and
+whether Flask was loaded. Warm: both handlers are invoked in-process with
+the same HTTP API events and the per-invocation latency is compared.
+
+Events carry API Gateway JWT authorizer claims for ``--username``, so the
+list route runs the real auth path (identity lookup, then its cache). Needs
+the same environment as the Lambda (DB_URL or DB_SECRET_ARN, the user
+models).
+
+Usage:
+  python scripts/bench_lambda_router.py [--iterations 2000] [--cold-runs 5]
+      [--schema public] [--username bench] [--routes health,list]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+HANDLERS = {
+    "wsgi": "src.app.example_api.example_api",
+    "fast": "src.app.example_api.fast_router",
+}
+
+_COLD = """
+import importlib, json, sys, time
+started = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+response = module.handler(json.loads(sys.argv[2]), None)
+done = time.perf_counter()
+print(json.dumps({
+    "init_ms": (imported - started) * 1000,
+    "first_ms": (done - imported) * 1000,
+    "status": response["statusCode"],
+    "flask": "flask" in sys.modules,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def http_event(path: str, query: str = "", username: str = "bench") -> dict:
+    """API Gateway HTTP API (payload 2.0) event with JWT authorizer claims."""
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": {"host": "bench.local", "accept": "application/json", "accept-encoding": "gzip, br"},
+        "requestContext": {
+            "http": {"method": "GET", "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1",
+                     "userAgent": "bench"},
+            "stage": "$default",
+            "domainName": "bench.local",
+            "authorizer": {"jwt": {"claims": {"cognito:username": username}, "scopes": None}},
+        },
+        "isBase64Encoded": False,
+    }
+
+
+def _events(args) -> dict:
+    events = {
+        "health": http_event("/api/health", username=args.username),
+        "list": http_event("/api/nota-servico", f"schema={args.schema}&limit={args.limit}", args.username),
+    }
+    return {name: events[name] for name in args.routes.split(",")}
+
+
+def _cold(module: str, event: dict, runs: int) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, os.path.join(ROOT, "src"), env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _COLD, module, json.dumps(event)],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            sys.exit(f"{module} failed:\n{out.stderr}")
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "init_ms": statistics.median(s["init_ms"] for s in samples),
+        "first_ms": statistics.median(s["first_ms"] for s in samples),
+        "status": samples[-1]["status"],
+        "flask": samples[-1]["flask"],
+        "modules": samples[-1]["modules"],
+    }
+
+
+def _warm(handler, event: dict, iterations: int) -> dict:
+    for _ in range(min(50, iterations)):
+        handler(event, None)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        handler(event, None)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {"p50_us": statistics.median(samples), "p95_us": samples[int(len(samples) * 0.95) - 1]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--schema", default="public")
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--routes", default="health,list")
+    args = parser.parse_args()
+    events = _events(args)
+
+    first_event = next(iter(events.values()))
+    print(f"cold start (median of {args.cold_runs}, first event: {first_event['rawPath']})")
+    print(f"{'handler':<8} {'init ms':>9} {'first ms':>9} {'status':>7} {'flask':>6} {'modules':>8}")
+    for name, module in HANDLERS.items():
+        r = _cold(module, first_event, args.cold_runs)
+        print(f"{name:<8} {r['init_ms']:>9.1f} {r['first_ms']:>9.1f} {r['status']:>7} "
+              f"{str(r['flask']):>6} {r['modules']:>8}")
+
+    import importlib  # noqa: WPS433 (runtime import)
+
+    handlers = {name: importlib.import_module(module).handler for name, module in HANDLERS.items()}
+    print(f"\nwarm per invocation ({args.iterations} iterations)")
+    print(f"{'route':<8} {'handler':<8} {'p50 us':>9} {'p95 us':>9}")
+    for route, event in events.items():
+        results = {name: _warm(handler, event, args.iterations) for name, handler in handlers.items()}
+        for name, r in results.items():
+            print(f"{route:<8} {name:<8} {r['p50_us']:>9.0f} {r['p95_us']:>9.0f}")
+        saved = results["wsgi"]["p50_us"] - results["fast"]["p50_us"]
+        print(f"{route:<8} {'saved':<8} {saved:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Reflect tables once and write the reflection cache for the deployment artifact.
+
+The output file is loaded by ``GenericCrudRepository`` at init when
+``DB_REFLECTION_CACHE`` points to it, so Lambda cold starts skip catalog
+reflection. It is ignored at runtime if SQLAlchemy or ``DB_SCHEMA_VERSION``
+differ from the values used here.
+
+Usage:
+  DB_URL=postgresql+psycopg2://... DB_SCHEMA_VERSION=<flyway version> \\
+    python scripts/dump_reflection_cache.py bmw nota_servico [other_table ...]
+
+Inputs:
+  - argv[1]: a tenant schema to reflect from (all tenants share the same shape)
+  - argv[2:]: table names
+  - DB_REFLECTION_CACHE_OUT: output path (default src/db_reflection_cache.pickle)
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+import sqlalchemy as sa  # noqa: E402
+
+from src.common.conexao_banco import get_engine  # noqa: E402
+from src.repositories.reflection_cache import ReflectionCache  # noqa: E402
+
+
+def _die(msg: str) -> None:
+    print(f"ERROR: {msg}", file=sys.stderr)
+    raise SystemExit(1)
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        _die("usage: dump_reflection_cache.py <schema> <table> [<table> ...]")
+    schema, tables = sys.argv[1], sys.argv[2:]
+    out = os.getenv("DB_REFLECTION_CACHE_OUT", os.path.join(ROOT, "src", "db_reflection_cache.pickle"))
+
+    engine = get_engine()
+    cache = ReflectionCache(bundled_path="", tmp_path="")
+    for name in tables:
+        try:
+            cache.add(sa.Table(name, sa.MetaData(), schema=schema, autoload_with=engine))
+        except sa.exc.NoSuchTableError:
+            _die(f"table not found: {schema}.{name}")
+    cache.save(out)
+    print(f"wrote {len(tables)} table(s) to {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Download the issuer's JWKS document so it ships with the deployment artifact.
+
+The output file is loaded by ``common.jwks_store`` at init when ``JWKS_FILE``
+points to it, so the first authenticated request does not wait for the
+HTTPS fetch. Keys published later (rotation) are still picked up by the
+background refresh.
+
+Usage:
+  COGNITO_ISSUER=https://cognito-idp.<region>.amazonaws.com/<pool_id> \\
+    python scripts/fetch_jwks.py
+
+Inputs:
+  - COGNITO_ISSUER (or ISSUERURL): required
+  - JWKS_FILE_OUT: output path (default src/jwks.json)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _die(msg: str) -> None:
+    print(f"ERROR: {msg}", file=sys.stderr)
+    raise SystemExit(1)
+
+
+def main() -> None:
+    issuer = os.getenv("COGNITO_ISSUER") or os.getenv("ISSUERURL")
+    if not issuer:
+        _die("COGNITO_ISSUER is not set")
+    out = os.getenv("JWKS_FILE_OUT", os.path.join(ROOT, "src", "jwks.json"))
+
+    url = issuer.rstrip("/") + "/.well-known/jwks.json"
+    with urllib.request.urlopen(url, timeout=10) as resp:
+        jwks = json.load(resp)
+    keys = jwks.get("keys") if isinstance(jwks, dict) else None
+    if not keys:
+        _die(f"no keys in {url}")
+
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(jwks, fh)
+    os.replace(tmp, out)
+    print(f"Wrote {len(keys)} key(s) to {out}: {', '.join(k.get('kid', '?') for k in keys)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Cold-start import profile of the Lambda handlers, with a budget check.
+
+Every module under ``src/app/<package>/`` that defines ``handler`` is imported
+in a fresh interpreter (``-X importtime``), ``--runs`` times. The report gives
+per handler:
+
+- import time (median wall time of ``import <module>``)
+- resident memory after the import, and what the import added to it
+- the heaviest imports: self time summed per top-level package (``sqlalchemy``,
+  ``jwt``, ``src`` ...), from the median run
+
+``<package>/vendor`` (what the build installs from ``requirements.txt``) is put
+on the path when it exists. ``DB_WARMUP=false`` is set, so the init-phase DB
+connect is not counted; everything else comes from the environment (DB_URL,
+COGNITO_ISSUER...), as on the Lambda. On a checkout without the private
+``models.schema_public``, ``bench_models`` stands in for it.
+
+``--check`` compares against ``scripts/import_budget.json`` and exits with 1
+when a handler's import time or memory exceeds its budget by more than
+``tolerance`` (relative) and ``slack`` (absolute). ``--update`` writes the measured values as the new budget;
+record it on the machine that runs the check (numbers are not portable).
+
+Usage:
+  python scripts/import_profile.py [--runs 5] [--top 10] [--check | --update]
+      [--module src.app.example_api.fast_router ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(ROOT, "scripts", "import_budget.json")
+DEFAULT_TOLERANCE = 0.25
+# Absolute headroom, so a 1 ms handler does not fail on noise.
+DEFAULT_SLACK = {"import_ms": 20.0, "rss_mb": 2.0}
+
+_HANDLER = re.compile(r"^(async\s+)?def handler\(", re.MULTILINE)
+
+# Separates interpreter start-up imports from the handler's in -X importtime output.
+_MARKER = "-- import profile: handler --"
+
+_PROBE = """
+import importlib, json, resource, sys, time
+
+# Stand-in for the private models.schema_public (only when it is missing),
+# installed before the timed import like in the benchmarks.
+import bench_models
+bench_models.install()
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+before = rss_mb()
+print(sys.argv[2], file=sys.stderr, flush=True)
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+after = rss_mb()
+print(json.dumps({"import_ms": elapsed * 1000, "rss_mb": after, "rss_added_mb": after - before,
+                  "modules": len(sys.modules)}))
+"""
+
+
+def discover() -> List[str]:
+    """Dotted names of the Lambda handler modules under src/app."""
+    modules = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "src", "app", "*", "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            if _HANDLER.search(f.read()):
+                modules.append(os.path.relpath(path, ROOT)[:-3].replace(os.sep, "."))
+    return modules
+
+
+def _env(module: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    paths = [ROOT, os.path.join(ROOT, "src"), os.path.join(ROOT, "scripts")]
+    vendor = os.path.join(ROOT, *module.split(".")[:3], "vendor")
+    if os.path.isdir(vendor):
+        paths.append(vendor)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [*paths, env.get("PYTHONPATH")]))
+    env["DB_WARMUP"] = "false"
+    return env
+
+
+def _heaviest(importtime: str, top: int) -> List[tuple]:
+    """(package, self ms) from ``-X importtime`` output, heaviest first."""
+    per_package: Dict[str, float] = defaultdict(float)
+    for line in importtime.split(_MARKER, 1)[-1].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def profile(module: str, runs: int, top: int) -> Dict[str, object]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE, module, _MARKER],
+            cwd=ROOT, env=_env(module), capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            sys.exit(f"import {module} failed:\n{out.stderr[-4000:]}")
+        sample = json.loads(out.stdout.strip().splitlines()[-1])
+        sample["heaviest"] = _heaviest(out.stderr, top)
+        samples.append(sample)
+    samples.sort(key=lambda s: s["import_ms"])
+    median = samples[len(samples) // 2]
+    median["rss_mb"] = statistics.median(s["rss_mb"] for s in samples)
+    median["rss_added_mb"] = statistics.median(s["rss_added_mb"] for s in samples)
+    return median
+
+
+def load_budget() -> Dict[str, object]:
+    if not os.path.exists(BUDGET_FILE):
+        return {"tolerance": DEFAULT_TOLERANCE, "slack": dict(DEFAULT_SLACK), "handlers": {}}
+    with open(BUDGET_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(results: Dict[str, Dict[str, object]], budget: Dict[str, object]) -> List[str]:
+    """Budget violations, as readable lines (empty when within budget)."""
+    tolerance = float(budget.get("tolerance", DEFAULT_TOLERANCE))
+    slack = {**DEFAULT_SLACK, **budget.get("slack", {})}
+    failures = []
+    for module, result in results.items():
+        limits = budget["handlers"].get(module)
+        if not limits:
+            print(f"  {module}: no budget (run --update to record one)")
+            continue
+        for key in ("import_ms", "rss_mb"):
+            allowed = max(limits[key] * (1 + tolerance), limits[key] + slack[key])
+            if result[key] > allowed:
+                failures.append(f"{module}: {key} {result[key]:.1f} > {allowed:.1f} (budget {limits[key]})")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--module", action="append", help="profile only these modules (repeatable)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail when over budget")
+    mode.add_argument("--update", action="store_true", help="record the measured values as the budget")
+    args = parser.parse_args()
+
+    results = {module: profile(module, args.runs, args.top) for module in (args.module or discover())}
+
+    print(f"import profile (median of {args.runs})")
+    print(f"{'handler':<44} {'import ms':>10} {'RSS MB':>8} {'+RSS MB':>8} {'modules':>8}")
+    for module, r in results.items():
+        print(f"{module:<44} {r['import_ms']:>10.1f} {r['rss_mb']:>8.1f} {r['rss_added_mb']:>8.1f} "
+              f"{r['modules']:>8}")
+    for module, r in results.items() if args.top else ():
+        print(f"\n{module}: heaviest imports (self ms per package)")
+        for package, ms in r["heaviest"]:
+            print(f"  {package:<30} {ms:>8.1f}")
+
+    budget = load_budget()
+    if args.update:
+        for module, r in results.items():
+            budget["handlers"][module] = {"import_ms": round(r["import_ms"], 1), "rss_mb": round(r["rss_mb"], 1)}
+        with open(BUDGET_FILE, "w", encoding="utf-8") as f:
+            json.dump(budget, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbudget written to {os.path.relpath(BUDGET_FILE, ROOT)}")
+    elif args.check:
+        print("\nbudget check")
+        failures = check(results, budget)
+        for line in failures:
+            print(f"  OVER {line}")
+        if failures:
+            sys.exit(1)
+        print("  ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 Endpoints:
 - GET /health  -> simple health probe
 - GET /        -> returns numbers 1..100 (demo)
+- GET /api/nota-servico/export?schema=<tenant>&format=ndjson|csv
+               -> streams every nota_servico row (server-side cursor)
 
 Why auth is optional here:
 The original template called `common.authorization.get_current_user()` on every
@@ -10,6 +12,9 @@ request, but the repository (as provided) does not include the ORM models that
 `common.authorization` imports (e.g., `models.schema_public`). That makes the
 container crash at startup.
 
+Without `ENABLE_AUTH=true` the tenant data routes (``/api/...``, here and in
+``asgi.py``) answer 403: only the template endpoints are served.
+
 For production:
 - keep `ENABLE_AUTH=true` and provide the missing models + DB schema, or
 - replace the auth layer with your real one.
@@ -17,20 +22,43 @@ For production:
 
 import os
 
-from flask import Flask, Response, request
+from flask import Flask, Response, request, stream_with_context
+
+from src.common.compression import init_compression
 
 app = Flask(__name__)
+init_compression(app)
+
+_nota_servico_service = None
+
+
+def _get_nota_servico_service():
+    """Create the service (and DB engine) on first use so template mode starts without a DB."""
+    global _nota_servico_service
+    if _nota_servico_service is None:
+        from src.services.nota_servico_service import NotaServicoService  # noqa: WPS433 (runtime import)
+
+        _nota_servico_service = NotaServicoService()
+    return _nota_servico_service
 
 
-def _auth_enabled() -> bool:
+# Tenant data: served only when requests are authenticated.
+DATA_ROUTE_PREFIX = "/api/"
+AUTH_REQUIRED = {"error": "tenant data routes require ENABLE_AUTH=true"}
+
+
+def auth_enabled() -> bool:
     return os.getenv("ENABLE_AUTH", "false").strip().lower() in {"1", "true", "yes"}
 
 
 def _maybe_auth():
-    if not _auth_enabled():
+    if not auth_enabled():
+        # Template mode: anyone reaching the ALB could read any tenant schema.
+        if request.path.startswith(DATA_ROUTE_PREFIX):
+            return AUTH_REQUIRED, 403
         return
     # Import only when enabled, so the container can start in template mode.
-    from common.authorization import get_current_user  # noqa: WPS433 (runtime import)
+    from src.common.authorization import get_current_user  # noqa: WPS433 (runtime import)
 
     if request.path == "/health":
         return
@@ -47,3 +75,26 @@ def health():
 @app.get("/")
 def root():
     return Response("\n".join(str(i) for i in range(1, 101)) + "\n", mimetype="text/plain")
+
+@app.get("/api/nota-servico/export")
+def export_nota_servico():
+    from sqlalchemy.exc import NoSuchTableError  # noqa: WPS433 (runtime import)
+    from src.common.export_formats import EXPORT_FORMATS, export_chunks  # noqa: WPS433 (runtime import)
+
+    schema = request.args.get("schema", "public")
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+    mimetype, encoder = EXPORT_FORMATS[fmt]
+
+    try:
+        columns, rows = _get_nota_servico_service().export(schema=schema)
+    except ValueError as exc:
+        return {"error": str(exc)}, 400
+    except NoSuchTableError:
+        return {"error": f"schema not found: {schema}"}, 404
+    except Exception as exc:
+        app.logger.exception("Failed to export nota_servico", extra={"schema": schema, "format": fmt})
+        return {"error": str(exc)}, 500
+
+    return Response(stream_with_context(export_chunks(encoder, columns, rows)), mimetype=mimetype)
@@ -0,0 +1,262 @@
+"""ASGI entry point for the ECS service.
+
+Serves the nota_servico endpoints on the asyncio stack (AsyncEngine +
+AsyncGenericCrudRepository) so one worker can keep many queries in flight;
+every other path falls through to the Flask app in ``app.py``.
+
+Endpoints (same contract as the Lambda API):
+- GET /health
+- GET /api/nota-servico?schema=&limit=&offset=&cursor=&total=
+- GET /api/nota-servico/export?schema=&format=ndjson|csv
+
+Run:
+  gunicorn -w 2 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8080 asgi:app
+  # or locally: uvicorn asgi:app --port 8080
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import AUTH_REQUIRED, app as flask_app, auth_enabled
+from src.common.compression import asgi_send
+
+log = logging.getLogger(__name__)
+
+_flask_asgi = WsgiToAsgi(flask_app)
+_service = None
+
+def _get_service():
+    """Create the async service (and engines) on first use."""
+    global _service
+    if _service is None:
+        from src.services.async_nota_servico_service import AsyncNotaServicoService  # noqa: WPS433 (runtime import)
+
+        _service = AsyncNotaServicoService()
+    return _service
+
+
+def _json_body(payload: Any) -> bytes:
+    from src.common.export_formats import json_default  # noqa: WPS433 (runtime import)
+
+    return json.dumps(payload, default=json_default).encode("utf-8")
+
+
+async def _send_json(send, status: int, payload: Any, headers: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+    body = _json_body(payload)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _etag_headers(etag: Optional[str]) -> List[Tuple[bytes, bytes]]:
+    from src.common.etags import CACHE_CONTROL  # noqa: WPS433 (runtime import)
+
+    if not etag:
+        return []
+    return [(b"etag", f'"{etag}"'.encode()), (b"cache-control", CACHE_CONTROL.encode())]
+
+
+def _query(scope) -> Dict[str, str]:
+    parsed = parse_qs(scope.get("query_string", b"").decode("utf-8"), keep_blank_values=True)
+    return {k: v[-1] for k, v in parsed.items()}
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+async def _authenticate(scope) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """Return an error (status, body) or None when the request may proceed."""
+    if not auth_enabled():
+        # Tenant data is never served unauthenticated (see app.py).
+        return 403, AUTH_REQUIRED
+    from src.common.custom_exception import CustomException  # noqa: WPS433 (runtime import)
+
+    try:
+        # Token check + user lookup are sync; keep them off the event loop.
+        await asyncio.to_thread(_check_token, _header(scope, b"authorization"))
+    except CustomException as exc:
+        return exc.status_code, exc.to_dict()
+    return None
+
+
+def _check_token(auth_header: str) -> None:
+    from src.common.authorization import authenticate_authorization_header  # noqa: WPS433 (runtime import)
+
+    # Error messages go through flask_babel, which needs an app context.
+    with flask_app.app_context():
+        authenticate_authorization_header(auth_header)
+
+
+async def list_nota_servico(scope, send) -> None:
+    from sqlalchemy.exc import NoSuchTableError  # noqa: WPS433 (runtime import)
+
+    from src.common.etags import etag_matches, make_etag  # noqa: WPS433 (runtime import)
+    from src.repositories.generic_crud_repository import InvalidCursorError, TOTAL_EXACT, TOTAL_STRATEGIES  # noqa: WPS433 (runtime import)
+
+    args = _query(scope)
+    schema = args.get("schema", "public")
+    total = args.get("total", TOTAL_EXACT)
+    if total not in TOTAL_STRATEGIES:
+        return await _send_json(send, 400, {"error": f"total must be one of: {', '.join(TOTAL_STRATEGIES)}"})
+    try:
+        limit = int(args.get("limit", 50))
+        offset = int(args.get("offset", 0))
+        max_bytes = int(args["max_bytes"]) if "max_bytes" in args else None
+        # Conditional GET: the version is read first, on the page's connection;
+        # unchanged table -> 304, no page query.
+        parts = ("json", sorted(args.items()))
+        if_none_match = _header(scope, b"if-none-match")
+        version, page = await _get_service().list_versioned(
+            schema=schema,
+            unchanged=lambda v: etag_matches(if_none_match, make_etag(v, *parts)),
+            limit=limit,
+            offset=offset,
+            cursor=args.get("cursor"),
+            total=total,
+            max_bytes=max_bytes,
+        )
+        etag = make_etag(version, *parts) if version else None
+        if page is None:
+            await send({"type": "http.response.start", "status": 304, "headers": _etag_headers(etag)})
+            return await send({"type": "http.response.body", "body": b""})
+    except (InvalidCursorError, ValueError) as exc:
+        return await _send_json(send, 400, {"error": str(exc)})
+    except NoSuchTableError:
+        return await _send_json(send, 404, {"error": f"schema not found: {schema}"})
+    except Exception as exc:
+        log.exception("Failed to list nota_servico", extra={"schema": schema})
+        return await _send_json(send, 500, {"error": str(exc)})
+
+    await _send_json(
+        send,
+        200,
+        {
+            "schema": schema,
+            "count": len(page.items),
+            "total": page.total,
+            "total_strategy": page.total_strategy,
+            "has_more": page.has_more,
+            "limit": page.limit,
+            "offset": page.offset,
+            "next_cursor": page.next_cursor,
+            "next_offset": page.next_offset,
+            "truncated": page.truncated,
+            "items": page.items,
+        },
+        _etag_headers(etag),
+    )
+
+
+async def export_nota_servico(scope, send) -> None:
+    from sqlalchemy.exc import NoSuchTableError  # noqa: WPS433 (runtime import)
+
+    from src.common.export_formats import EXPORT_FORMATS, aexport_chunks  # noqa: WPS433 (runtime import)
+
+    args = _query(scope)
+    schema = args.get("schema", "public")
+    fmt = args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return await _send_json(send, 400, {"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"})
+    mimetype, encoder = EXPORT_FORMATS[fmt]
+
+    try:
+        columns, rows = await _get_service().export(schema=schema)
+    except ValueError as exc:
+        return await _send_json(send, 400, {"error": str(exc)})
+    except NoSuchTableError:
+        return await _send_json(send, 404, {"error": f"schema not found: {schema}"})
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", mimetype.encode())],
+        }
+    )
+    try:
+        async for chunk in aexport_chunks(encoder, columns, rows):
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+    except Exception:
+        # Headers are already sent: log and cut the stream short.
+        log.exception("Failed while streaming nota_servico export", extra={"schema": schema, "format": fmt})
+    await send({"type": "http.response.body", "body": b""})
+
+
+ROUTES = {
+    ("GET", "/api/nota-servico"): list_nota_servico,
+    ("GET", "/api/nota-servico/export"): export_nota_servico,
+}
+
+
+async def _profiled(route, scope, send) -> None:
+    """Run ``route`` as one SQL profiler request (no-op unless SQL_PROFILER is on)."""
+    from src.common import sql_profiler  # noqa: WPS433 (runtime import)
+
+    if not sql_profiler.enabled():
+        return await route(scope, send)
+
+    status = 500
+
+    async def _send(message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        await send(message)
+
+    sql_profiler.start_request()
+    try:
+        await route(scope, _send)
+    finally:
+        sql_profiler.log_request_summary(scope["path"], status)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if _service is not None:
+                from src.common.conexao_banco_async import dispose_async_engines  # noqa: WPS433 (runtime import)
+
+                await dispose_async_engines()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+
+    if scope["type"] == "http":
+        path = scope["path"]
+        if path == "/health":
+            return await _send_json(send, 200, {"ok": True})
+
+        route = ROUTES.get((scope["method"], path))
+        if route is not None:
+            error = await _authenticate(scope)
+            if error is not None:
+                return await _send_json(send, *error)
+            # Flask responses are compressed by init_compression in app.py.
+            return await _profiled(route, scope, asgi_send(scope, send))
+
+    await _flask_asgi(scope, receive, send)
@@ -1,37 +1,62 @@
 # src/app/example_api/example_api.py
 from __future__ import annotations
 
-from datetime import datetime, timezone
 import logging
 import os
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from sqlalchemy.exc import NoSuchTableError
 import serverless_wsgi
 
-from ...services.nota_servico_service import NotaServicoService
-from common.authorization import authenticate
+# One import path for common.*: a second copy (``common.``) would bring its
+# own engine, profiler and metrics, which this app never sees.
+from ...common.authorization import authenticate
+from ...common.compression import init_compression
+from ...common.conexao_banco import init_db_timings, init_read_your_writes
+from ...common.custom_exception import CustomException
+from ...common.error_handling import all_exception_handler
+from ...common.export_formats import EXPORT_FORMATS, export_chunks
+from ...common.metrics import init_metrics
+from ...common import sql_profiler
+from ...repositories.generic_crud_repository import RETURN_NONE, RETURNING_MODES
+from . import nota_servico_api
 
 # -----------------------------------------------------------------------------
 # App configuration
 # -----------------------------------------------------------------------------
 
 ROUTE_PREFIX = "/api"
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+SQL_PROFILE_MAX_TOP = 200
 
 app = Flask(__name__)
-nota_servico_service = NotaServicoService()
 
 # Ensure logs show up in CloudWatch with a predictable level.
 logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+# First: after_request hooks run in reverse, so compression sees the final response.
+init_compression(app)
+init_read_your_writes(app)
+init_db_timings(app)
+init_metrics(app)
+# Before authenticate() so the user lookup is profiled too.
+sql_profiler.init_sql_profiler(app)
 authenticate(app)
+# Auth failures -> {"error": {...}} with their status (same as the fast path).
+app.register_error_handler(CustomException, all_exception_handler)
 
 # -----------------------------------------------------------------------------
 # Helper functions
 # -----------------------------------------------------------------------------
 
-def now_iso() -> str:
-    """Return current UTC time in ISO-8601 format."""
-    return datetime.now(timezone.utc).isoformat()
+def _flask_response(status: int, body, headers) -> Response:
+    """Flask response for a ``nota_servico_api`` result."""
+    if isinstance(body, dict):
+        response = jsonify(body)
+        response.status_code = status
+        response.headers.update(headers)
+        return response
+    return Response(body, status=status, headers=headers)
 
 
 # -----------------------------------------------------------------------------
@@ -40,38 +65,105 @@ def now_iso() -> str:
 
 @app.get(f"{ROUTE_PREFIX}/nota-servico")
 def list_nota_servico():
+    return _flask_response(
+        *nota_servico_api.list_nota_servico(
+            request.args.to_dict(),
+            accept=request.headers.get("Accept"),
+            if_none_match=request.headers.get("If-None-Match"),
+        )
+    )
+
+
+@app.get(f"{ROUTE_PREFIX}/nota-servico/export")
+def export_nota_servico():
+    """Stream all rows as NDJSON (default) or CSV (``format=csv``).
+
+    Note: API Gateway buffers Lambda responses (6 MB limit); large exports
+    should use the ECS service route, which streams end to end.
+    """
     schema = request.args.get("schema", "public")
-    limit = int(request.args.get("limit", 50))
-    offset = int(request.args.get("offset", 0))
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    mimetype, encoder = EXPORT_FORMATS[fmt]
 
     try:
-        page = nota_servico_service.list(schema=schema, limit=limit, offset=offset)
-        return jsonify(
-            {
-                "schema": schema,
-                "count": len(page.items),
-                "total": page.total,
-                "limit": page.limit,
-                "offset": page.offset,
-                "items": page.items,
-            }
-        ), 200
+        columns, rows = nota_servico_api.get_service().export(schema=schema)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except NoSuchTableError:
+        return jsonify({"error": f"schema not found: {schema}"}), 404
+    except Exception as exc:
+        app.logger.exception("Failed to export nota_servico", extra={"schema": schema, "format": fmt})
+        return jsonify({"error": str(exc)}), 500
+
+    return Response(stream_with_context(export_chunks(encoder, columns, rows)), mimetype=mimetype)
+
+
+@app.post(f"{ROUTE_PREFIX}/nota-servico/batch")
+def batch_nota_servico():
+    """Bulk create/upsert/update/delete.
+
+    Body: ``{"op": "create|upsert|update|delete", "items": [...], "returning": "none|keys|rows"}``.
+    For ``delete`` the items are primary key values.
+    """
+    schema = request.args.get("schema", "public")
+    body = request.get_json(silent=True) or {}
+    op = body.get("op")
+    items = body.get("items")
+    returning = body.get("returning", RETURN_NONE)
+
+    # op -> service method
+    operations = {
+        "create": "create_many",
+        "upsert": "upsert_many",
+        "update": "update_many",
+        "delete": "delete_many",
+    }
+    if op not in operations:
+        return jsonify({"error": f"op must be one of: {', '.join(operations)}"}), 400
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"at most {BATCH_MAX_ITEMS} items per batch"}), 400
+    if returning not in RETURNING_MODES:
+        return jsonify({"error": f"returning must be one of: {', '.join(RETURNING_MODES)}"}), 400
+
+    kwargs = {} if op == "update" else {"returning": returning}
+    try:
+        result = getattr(nota_servico_api.get_service(), operations[op])(schema, items, **kwargs)
+        return jsonify({"schema": schema, "op": op, "count": result.count, "items": result.items}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except NoSuchTableError:
+        return jsonify({"error": f"schema not found: {schema}"}), 404
     except Exception as exc:
         app.logger.exception(
-            "Failed to list nota_servico",
-            extra={
-                "schema": schema,
-                "limit": limit,
-                "offset": offset,
-                "query_string": request.query_string.decode("utf-8", errors="ignore"),
-            },
+            "Failed batch nota_servico",
+            extra={"schema": schema, "op": op, "items": len(items)},
         )
         return jsonify({"error": str(exc)}), 500
 
 
+@app.get(f"{ROUTE_PREFIX}/debug/sql-profile")
+def sql_profile():
+    """Top statements by total time and recent slow queries (SQL_PROFILER only)."""
+    if not sql_profiler.enabled():
+        return jsonify({"error": "SQL_PROFILER is disabled"}), 404
+    if request.args.get("reset") == "true":
+        sql_profiler.profiler.reset()
+        return jsonify(reset=True), 200
+    try:
+        top = int(request.args.get("top", 20))
+    except ValueError:
+        return jsonify({"error": "top must be an integer"}), 400
+    top = min(max(top, 1), SQL_PROFILE_MAX_TOP)
+    return jsonify(sql_profiler.profiler.snapshot(top=top)), 200
+
+
 @app.get(f"{ROUTE_PREFIX}/health")
 def health():
-    return jsonify(ok=True, service="example_api", at=now_iso())
+    return _flask_response(*nota_servico_api.health())
 
 
 # -----------------------------------------------------------------------------
@@ -0,0 +1,176 @@
+"""Lambda fast path for the hot example_api routes.
+
+``handler`` answers API Gateway HTTP API events (payload 2.0) for
+
+- ``GET /api/health``
+- ``GET /api/nota-servico``
+
+straight from the event: no WSGI environ, no Flask routing, and Flask,
+Werkzeug and serverless_wsgi are never imported for them. Every other event
+(other routes, REST API / ALB payloads, or ``FAST_ROUTER=false``) goes to the
+Flask app through ``serverless_wsgi``, which is imported on first use.
+
+Shared with the Flask path:
+- the route logic (``nota_servico_api``): negotiation, ETag / 304, error bodies
+- auth: API Gateway JWT claims, else in-app verification of the bearer token
+  (``common.authorization.authenticate_event``); a ``CustomException``
+  becomes its ``to_dict()`` body and status, as with Flask's error handler
+- per-request scope: read-your-writes reset, ``Server-Timing``, SQL profile,
+  metrics flush, and response compression
+
+To use it, point the function at
+``src.app.example_api.fast_router.handler`` instead of ``example_api.handler``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qsl
+import base64
+import json
+import logging
+import os
+
+from ...common import compression, sql_profiler
+from ...common.authorization import authenticate_event, prefetch_jwks
+from ...common.conexao_banco import reset_db_timings, reset_read_your_writes, server_timing
+from ...common.custom_exception import CustomException
+from ...common.export_formats import json_default
+from ...common.metrics import metrics
+from . import nota_servico_api
+
+ROUTE_PREFIX = "/api"
+
+log = logging.getLogger(__name__)
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+_JSON = json.JSONEncoder(default=json_default, separators=(",", ":"), ensure_ascii=False)
+
+# Same rule as serverless_wsgi: these go out as text, everything else base64.
+_TEXT_MIMETYPES = ("application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+_wsgi_handler: Optional[Callable[[Dict[str, Any], Any], Dict[str, Any]]] = None
+
+prefetch_jwks()
+
+
+def enabled() -> bool:
+    return os.getenv("FAST_ROUTER", "true").strip().lower() in {"1", "true", "yes"}
+
+
+def _header(event: Dict[str, Any], name: str) -> Optional[str]:
+    # HTTP API lower-cases header names.
+    return (event.get("headers") or {}).get(name)
+
+
+def _args(event: Dict[str, Any]) -> Dict[str, str]:
+    """First value of each query parameter (like ``request.args.get``); blanks kept."""
+    args: Dict[str, str] = {}
+    for key, value in parse_qsl(event.get("rawQueryString") or "", keep_blank_values=True):
+        args.setdefault(key, value)
+    return args
+
+
+def _list_nota_servico(event: Dict[str, Any]) -> nota_servico_api.Result:
+    return nota_servico_api.list_nota_servico(
+        _args(event), accept=_header(event, "accept"), if_none_match=_header(event, "if-none-match")
+    )
+
+
+def _health(event: Dict[str, Any]) -> nota_servico_api.Result:
+    return nota_servico_api.health()
+
+
+# (method, path) -> (handler, needs auth)
+ROUTES = {
+    ("GET", f"{ROUTE_PREFIX}/health"): (_health, False),
+    ("GET", f"{ROUTE_PREFIX}/nota-servico"): (_list_nota_servico, True),
+}
+
+
+def _route(event: Dict[str, Any]):
+    if not enabled() or event.get("version") != "2.0":
+        return None
+    try:
+        method = event["requestContext"]["http"]["method"]
+    except (KeyError, TypeError):
+        return None
+    return ROUTES.get((method, event.get("rawPath")))
+
+
+def _is_text(mimetype: str) -> bool:
+    mimetype = mimetype.split(";", 1)[0].strip().lower()
+    return mimetype.startswith("text/") or mimetype in _TEXT_MIMETYPES or mimetype.endswith("+json")
+
+
+def _lambda_response(status: int, body: Any, headers: Dict[str, str], event: Dict[str, Any]) -> Dict[str, Any]:
+    headers = dict(headers)
+    if isinstance(body, dict):
+        data = _JSON.encode(body).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    else:
+        data = body
+    mimetype = headers.get("Content-Type", "")
+    headers["Server-Timing"] = server_timing()
+
+    encoding = None
+    if 200 <= status < 300 and compression.is_compressible(mimetype):
+        headers["Vary"] = "Accept-Encoding"
+        # A compressed body is base64-encoded below: for a body that would
+        # otherwise go out as text, compressing must beat that overhead.
+        data, encoding = compression.compress_body(
+            data, mimetype, _header(event, "accept-encoding"), _is_text(mimetype)
+        )
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        if headers.get("ETag", "").startswith('"'):
+            headers["ETag"] = "W/" + headers["ETag"]
+
+    response: Dict[str, Any] = {"statusCode": status, "headers": headers}
+    if data:
+        binary = encoding is not None or not _is_text(mimetype)
+        response["isBase64Encoded"] = binary
+        response["body"] = base64.b64encode(data).decode("ascii") if binary else data.decode("utf-8")
+    return response
+
+
+def _dispatch(route, event: Dict[str, Any]) -> nota_servico_api.Result:
+    fn, needs_auth = route
+    try:
+        if needs_auth:
+            authenticate_event(event)
+        return fn(event)
+    except CustomException as exc:
+        return exc.status_code, exc.to_dict(), {}
+    except Exception as exc:
+        log.exception("Fast path request failed", extra={"path": event.get("rawPath")})
+        return 500, {"error": str(exc)}, {}
+
+
+def handler(event, context):
+    """AWS Lambda entrypoint: fast path for hot routes, Flask for the rest."""
+    route = _route(event)
+    if route is None:
+        return _wsgi(event, context)
+
+    reset_read_your_writes()
+    reset_db_timings()
+    profiling = sql_profiler.enabled()
+    if profiling:
+        sql_profiler.start_request()
+    try:
+        status, body, headers = _dispatch(route, event)
+        if profiling:
+            sql_profiler.log_request_summary(event.get("rawPath"), status)
+        return _lambda_response(status, body, headers, event)
+    finally:
+        metrics.flush_if_due()
+
+
+def _wsgi(event, context):
+    global _wsgi_handler
+    if _wsgi_handler is None:
+        from .example_api import handler as wsgi_handler  # noqa: WPS433 (runtime import)
+
+        _wsgi_handler = wsgi_handler
+    return _wsgi_handler(event, context)
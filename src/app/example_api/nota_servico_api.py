@@ -0,0 +1,125 @@
+"""Framework-free handlers for the hot example_api routes.
+
+Shared by the Flask app (``example_api.py``) and the Lambda fast path
+(``fast_router.py``), so both serve the same contract: format negotiation,
+ETag / 304, error bodies and status codes.
+
+Handlers take plain values (query arguments, header values) and return
+``(status, body, headers)``. ``body`` is a JSON payload (dict), or bytes
+whose media type is in ``headers["Content-Type"]``.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+import logging
+
+from sqlalchemy.exc import NoSuchTableError
+
+from ...common.conexao_banco import warm_up, warm_up_enabled
+from ...common.etags import CACHE_CONTROL, etag_matches, make_etag
+from ...common.wire_formats import ENCODERS, FORMAT_JSON, MIMETYPES, UnsupportedFormatError, negotiate
+from ...repositories.generic_crud_repository import TOTAL_EXACT, TOTAL_STRATEGIES
+from ...services.nota_servico_service import NotaServicoService
+
+Result = Tuple[int, Union[Dict[str, Any], bytes], Dict[str, str]]
+
+log = logging.getLogger(__name__)
+
+_nota_servico_service: Optional[NotaServicoService] = None
+
+# Open the DB connection during the Lambda init phase instead of inside the
+# first request (bounded by DB_WARMUP_BUDGET_MS). Off by default outside
+# DB_CONNECTION_MODE=lambda; then the engine is created by the first query.
+if warm_up_enabled():
+    warm_up()
+
+
+def get_service() -> NotaServicoService:
+    """Create the service (repository, reflection cache, engine) on first use."""
+    global _nota_servico_service
+    if _nota_servico_service is None:
+        _nota_servico_service = NotaServicoService()
+    return _nota_servico_service
+
+
+def now_iso() -> str:
+    """Return current UTC time in ISO-8601 format."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def health() -> Result:
+    return 200, {"ok": True, "service": "example_api", "at": now_iso()}, {}
+
+
+def _etag_headers(etag: Optional[str]) -> Dict[str, str]:
+    """ETag (if any), and make clients revalidate before reusing the body."""
+    if not etag:
+        return {}
+    return {"ETag": f'"{etag}"', "Cache-Control": CACHE_CONTROL}
+
+
+def list_nota_servico(
+    args: Mapping[str, str], accept: Optional[str] = None, if_none_match: Optional[str] = None
+) -> Result:
+    """``GET /api/nota-servico``; ``args`` holds the first value of each query parameter."""
+    schema = args.get("schema", "public")
+    try:
+        limit = int(args.get("limit", 50))
+        offset = int(args.get("offset", 0))
+        # Lowers the page byte budget (LIST_MAX_BYTES); never raises it.
+        max_bytes = int(args["max_bytes"]) if "max_bytes" in args else None
+    except ValueError:
+        return 400, {"error": "limit, offset and max_bytes must be integers"}, {}
+    # Presence of `cursor` (even empty) switches to keyset pagination.
+    cursor = args.get("cursor")
+    total = args.get("total", TOTAL_EXACT)
+    if total not in TOTAL_STRATEGIES:
+        return 400, {"error": f"total must be one of: {', '.join(TOTAL_STRATEGIES)}"}, {}
+
+    # Content negotiation: ?format= or Accept (json, columnar, csv, arrow, parquet).
+    try:
+        fmt = negotiate(accept, args.get("format"))
+    except UnsupportedFormatError as exc:
+        return 406, {"error": str(exc)}, {}
+
+    try:
+        # Conditional GET: the version is read first, on the page's connection;
+        # unchanged table -> 304, no page query.
+        parts = (fmt, sorted(args.items()))
+        version, page = get_service().list_versioned(
+            schema=schema, unchanged=lambda v: etag_matches(if_none_match, make_etag(v, *parts)),
+            limit=limit, offset=offset, cursor=cursor, total=total,
+            as_rows=fmt != FORMAT_JSON, max_bytes=max_bytes,
+        )
+        etag = make_etag(version, *parts) if version else None
+        if page is None:
+            return 304, b"", _etag_headers(etag)
+        meta = {
+            "schema": schema,
+            "count": len(page.items),
+            "total": page.total,
+            "total_strategy": page.total_strategy,
+            "has_more": page.has_more,
+            "limit": page.limit,
+            "offset": page.offset,
+            "next_cursor": page.next_cursor,
+            "next_offset": page.next_offset,
+            "truncated": page.truncated,
+        }
+        if fmt == FORMAT_JSON:
+            return 200, {**meta, "items": page.items}, _etag_headers(etag)
+        body, headers = ENCODERS[fmt](meta, page.columns, page.items)
+        return 200, body, {"Content-Type": MIMETYPES[fmt], **headers, **_etag_headers(etag)}
+    except ValueError as exc:
+        # Hard limits, invalid cursor or schema name.
+        return 400, {"error": str(exc)}, {}
+    except NoSuchTableError:
+        return 404, {"error": f"schema not found: {schema}"}, {}
+    except Exception as exc:
+        log.exception(
+            "Failed to list nota_servico",
+            extra={"schema": schema, "limit": limit, "offset": offset, "query_args": dict(args)},
+        )
+        return 500, {"error": str(exc)}, {}
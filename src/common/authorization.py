@@ -1,25 +1,42 @@
 #Repositories
 #Services
+import hashlib
 import os
+import sys
+import time
 from functools import lru_cache
 
-from common.conexao_banco import session
-from common.custom_exception import CustomException
-from common.error_messages import *
+from .conexao_banco import get_read_session
+from .custom_exception import CustomException
+from .error_messages import *
+from .ttl_cache import TTLCache
 
 #Tables
 from models.schema_public import User
 
 #Libs
-from sqlalchemy import and_
-from flask import request, g
-from flask_babel import _
-import jwt
-from jwt import PyJWKClient
+import sqlalchemy as sa
+from sqlalchemy import and_, event
+from sqlalchemy.orm import Mapper, joinedload
 
+# Flask is imported where a request is needed, so the Lambda fast path
+# (src/app/example_api/fast_router.py) can authenticate without loading it.
+# PyJWT (with `cryptography`, ~60 ms of cold start) is imported with the JWKS
+# store: only when tokens are verified in-app (COGNITO_ISSUER set).
 
-def _get_bearer_token() -> str:
-    auth = request.headers.get("Authorization", "").strip()
+
+def _(message: str) -> str:
+    """flask_babel gettext when a Flask app with Babel is active, else the message as-is."""
+    flask = sys.modules.get("flask")
+    if flask is None or not flask.has_app_context() or "babel" not in flask.current_app.extensions:
+        return message
+    from flask_babel import gettext  # noqa: WPS433 (runtime import)
+
+    return gettext(message)
+
+
+def _parse_bearer_token(auth: str) -> str:
+    auth = (auth or "").strip()
     if not auth:
         raise CustomException(_("Missing Authorization header"))
     if not auth.lower().startswith("bearer "):
@@ -27,13 +44,17 @@ def _get_bearer_token() -> str:
     return auth.split(" ", 1)[1].strip()
 
 
-def _claims_from_apigw_context() -> dict | None:
+def _get_bearer_token() -> str:
+    from flask import request  # noqa: WPS433 (runtime import)
+
+    return _parse_bearer_token(request.headers.get("Authorization", ""))
+
+
+def claims_from_event(event) -> dict | None:
     """
-    When using serverless-wsgi with HTTP API, the raw APIGW event is often stored here.
-    JWT authorizer claims are in:
+    JWT authorizer claims already validated by API Gateway (HTTP API):
       event.requestContext.authorizer.jwt.claims
     """
-    event = request.environ.get("apig_wsgi.event")
     if not isinstance(event, dict):
         return None
     try:
@@ -42,19 +63,55 @@ def _claims_from_apigw_context() -> dict | None:
         return None
 
 
+def _claims_from_apigw_context() -> dict | None:
+    """serverless-wsgi keeps the raw API Gateway event in the WSGI environ."""
+    from flask import request  # noqa: WPS433 (runtime import)
+
+    event = request.environ.get("serverless.event") or request.environ.get("apig_wsgi.event")
+    return claims_from_event(event)
+
+
 @lru_cache(maxsize=2)
-def _jwks_client(issuer: str) -> PyJWKClient:
-    jwks_url = issuer.rstrip("/") + "/.well-known/jwks.json"
-    return PyJWKClient(jwks_url)
+def _jwks_client(issuer: str) -> "JwksKeyStore":
+    from .jwks_store import JwksKeyStore  # noqa: WPS433 (runtime import)
 
+    # Keys come from memory only; fetching happens at init or in the background.
+    return JwksKeyStore.from_env(issuer)
 
-def _verify_and_decode(token: str) -> dict:
+
+def prefetch_jwks() -> None:
+    """Load the signing keys during init so no request waits for the JWKS fetch."""
+    issuer = os.getenv("COGNITO_ISSUER") or os.getenv("ISSUERURL")
+    if issuer:
+        _jwks_client(issuer).prefetch()
+
+
+# Verified claims keyed by sha256(token); each entry expires at the token's
+# `exp`, so a cached token is never accepted past its expiry.
+_CLAIMS_CACHE = TTLCache(
+    maxsize=int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("JWT_CLAIMS_CACHE_MAX_TTL", "3600")),
+)
+# Revocations outlive the cache entries they evict: revoked digests until the
+# token's `exp`, revoked subjects for the longest token lifetime.
+_MAX_TOKEN_LIFETIME = float(os.getenv("JWT_MAX_LIFETIME", "86400"))
+_REVOKED_TOKENS = TTLCache(maxsize=10000, ttl=_MAX_TOKEN_LIFETIME)
+_REVOKED_SUBJECTS = TTLCache(maxsize=10000, ttl=_MAX_TOKEN_LIFETIME)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _verify_signature(token: str) -> dict:
     issuer = os.getenv("COGNITO_ISSUER") or os.getenv("ISSUERURL")
     audience = os.getenv("COGNITO_AUDIENCE") or os.getenv("AUDIENCE")
 
     if not issuer or not audience:
         raise CustomException(_("Missing COGNITO_ISSUER/COGNITO_AUDIENCE env vars"))
 
+    import jwt  # noqa: WPS433 (runtime import)
+
     try:
         key = _jwks_client(issuer).get_signing_key_from_jwt(token).key
         return jwt.decode(
@@ -69,6 +126,50 @@ def _verify_and_decode(token: str) -> dict:
         raise CustomException(_("Invalid or expired token")) from exc
 
 
+def _is_revoked(digest: bytes, claims: dict) -> bool:
+    if _REVOKED_TOKENS.get(digest):
+        return True
+    revoked_at = _REVOKED_SUBJECTS.get(_extract_username(claims))
+    return revoked_at is not None and claims.get("iat", 0) <= revoked_at
+
+
+def _verify_and_decode(token: str) -> dict:
+    """Verify a JWT (RS256 + JWKS), reusing the claims of a token already verified."""
+    digest = _token_digest(token)
+    claims = _CLAIMS_CACHE.get(digest)
+    if claims is None:
+        claims = _verify_signature(token)
+        ttl = claims["exp"] - time.time()
+        if ttl > 0:
+            _CLAIMS_CACHE.set(digest, claims, ttl=min(ttl, _CLAIMS_CACHE.ttl))
+
+    if _is_revoked(digest, claims):
+        raise CustomException(_("Invalid or expired token"))
+    return claims
+
+
+def revoke_token(token: str) -> None:
+    """Reject ``token`` from now on (e.g. logout), even though its signature is still valid."""
+    digest = _token_digest(token)
+    claims = _CLAIMS_CACHE.pop(digest)
+    ttl = _MAX_TOKEN_LIFETIME if claims is None else max(claims["exp"] - time.time(), 1.0)
+    _REVOKED_TOKENS.set(digest, True, ttl=ttl)
+
+
+def revoke_subject(username: str) -> None:
+    """Reject every token of ``username`` issued up to now (password change, user disabled)."""
+    _REVOKED_SUBJECTS.set(username, time.time())
+    invalidate_user(username)
+
+
+def clear_claims_cache() -> None:
+    _CLAIMS_CACHE.clear()
+
+
+def claims_cache_stats() -> dict:
+    return _CLAIMS_CACHE.stats()
+
+
 def _extract_username(claims: dict) -> str:
     if not isinstance(claims, dict):
         return ""
@@ -79,24 +180,43 @@ def _extract_username(claims: dict) -> str:
     return ""
 
 
-def get_current_user():
-    # 1) Preferred: claims already validated by API Gateway
-    claims = _claims_from_apigw_context()
+# Resolved identities (detached User with its Cliente loaded) keyed by
+# username. Deactivations made through the ORM in this process invalidate
+# entries immediately; changes made elsewhere are seen after USER_CACHE_TTL.
+_USER_CACHE = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+)
 
-    # 2) Fallback: verify JWT in-app (defense in depth)
-    if not claims:
-        token = _get_bearer_token()
-        claims = _verify_and_decode(token)
 
+def _load_user(username: str):
+    # One round trip: the client comes in the same joined query.
+    # Read-only lookup: served by the read replica, no commit round trip.
+    with get_read_session() as session:
+        return (
+            session.query(User)
+            .options(joinedload(User.Cliente))
+            .filter(and_(User.Ativo == True, User.Excluido == False, User.Username == username))
+            .first()
+        )
+
+
+def resolve_user(claims: dict):
+    """
+    Load the active user (and check its client) for already-verified claims.
+
+    The returned User is shared between requests through the identity cache:
+    treat it as read-only (merge it into a session before changing it).
+    """
     username = _extract_username(claims)
     if not username:
         raise CustomException(_("Username not found in token claims"))
 
-    user = (
-        session.query(User)
-        .filter(and_(User.Ativo == True, User.Excluido == False, User.Username == username))
-        .first()
-    )
+    user = _USER_CACHE.get(username)
+    if user is not None:
+        return user
+
+    user = _load_user(username)
 
     if not user:
         raise CustomException(_(X_NOT_FOUND).format(_(USER) + ': ' + username))
@@ -104,6 +224,68 @@ def get_current_user():
     if user.Cliente.Ativo == False or user.Cliente.Excluido == True:
         raise CustomException(_(USER_BELONGS_TO_DEACTIVATED_CUSTOMER))
 
+    _USER_CACHE.set(username, user)
+    return user
+
+
+def invalidate_user(username: str = None) -> None:
+    """Drop one cached identity (or all of them)."""
+    if username is None:
+        _USER_CACHE.clear()
+        return
+    _USER_CACHE.pop(username)
+
+
+def invalidate_client(client_identity) -> None:
+    """Drop the cached identities of every user of a client (primary key tuple)."""
+    # Scans the (bounded) cache itself: no per-client index to grow or go stale.
+    _USER_CACHE.pop_matching(lambda username, user: sa.inspect(user.Cliente).identity == client_identity)
+
+
+@event.listens_for(Mapper, "after_update")
+def _invalidate_on_update(mapper, connection, target):
+    # Resolved lazily: the Cliente class is only known once mappers are configured.
+    if isinstance(target, User):
+        invalidate_user(target.Username)
+    elif isinstance(target, User.Cliente.property.mapper.class_):
+        invalidate_client(sa.inspect(target).identity)
+
+
+def authenticate_authorization_header(auth_header: str):
+    """
+    Verify a raw ``Authorization: Bearer`` header value and return the user.
+
+    Framework-agnostic entry point (used by the ASGI service); Flask code
+    should call :func:`get_current_user`.
+    """
+    claims = _verify_and_decode(_parse_bearer_token(auth_header))
+    return resolve_user(claims)
+
+
+def authenticate_event(event: dict):
+    """
+    Authenticate a raw API Gateway HTTP API event and return the user: the
+    same rules as :func:`get_current_user`, without Flask (Lambda fast path).
+    """
+    claims = claims_from_event(event)
+    if not claims:
+        headers = event.get("headers") or {}
+        claims = _verify_and_decode(_parse_bearer_token(headers.get("authorization", "")))
+    return resolve_user(claims)
+
+
+def get_current_user():
+    from flask import g  # noqa: WPS433 (runtime import)
+
+    # 1) Preferred: claims already validated by API Gateway
+    claims = _claims_from_apigw_context()
+
+    # 2) Fallback: verify JWT in-app (defense in depth)
+    if not claims:
+        token = _get_bearer_token()
+        claims = _verify_and_decode(token)
+
+    user = resolve_user(claims)
     g.user = user
     return user
 
@@ -113,6 +295,9 @@ def authenticate(app):
     Call authenticate(app) once when creating the Flask app.
     This will enforce authentication on every request.
     """
+    from flask import request  # noqa: WPS433 (runtime import)
+
+    prefetch_jwks()
 
     @app.before_request
     def _auth_before_request():
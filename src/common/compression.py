@@ -0,0 +1,318 @@
+"""Negotiated response compression (gzip, brotli, zstd).
+
+``init_compression(app)`` compresses Flask responses after every other
+``after_request`` hook:
+
+- the encoding comes from ``Accept-Encoding`` (client q-values first, then the
+  server preference ``COMPRESSION_ENCODINGS``, default ``br,zstd,gzip``);
+  ``br`` and ``zstd`` need the optional ``brotli`` / ``zstandard`` packages
+- only compressible types (text, JSON, CSV, Arrow IPC) are touched; Parquet is
+  already compressed
+- buffered bodies under ``COMPRESSION_MIN_BYTES`` (default 1024) go out as-is,
+  and so does a body that would not get smaller
+- streamed bodies (``stream_with_context`` exports) are compressed chunk by
+  chunk with a sync flush, so every chunk can be sent as soon as it is ready
+
+On Lambda, ``serverless_wsgi`` base64-encodes every body that carries a
+``Content-Encoding`` (``isBase64Encoded: true``) and the HTTP API decodes it
+again. The 4/3 base64 overhead counts against the 6 MB Lambda payload limit,
+so a body that would otherwise go out as plain text (``text/*``, JSON, XML) is
+only compressed when compressing beats that overhead; other types are
+base64-encoded either way.
+
+``asgi_send`` does the same for responses written directly with ASGI
+``send`` calls (the ECS ``asgi.py`` routes).
+
+Set ``COMPRESSION=false`` to disable it. Levels: ``COMPRESSION_LEVEL_GZIP``
+(default 5), ``COMPRESSION_LEVEL_BR`` (4), ``COMPRESSION_LEVEL_ZSTD`` (3).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import os
+import zlib
+
+try:  # Optional: only needed for br.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+try:  # Optional: only needed for zstd.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the deployment
+    zstandard = None
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+DEFAULT_LEVELS = {GZIP: 5, BROTLI: 4, ZSTD: 3}
+
+# Lambda bodies with a Content-Encoding are base64-encoded by serverless_wsgi.
+_BASE64_OVERHEAD = 4 / 3
+
+# Types serverless_wsgi sends as plain text when not encoded (serverless_wsgi.TEXT_MIME_TYPES).
+_LAMBDA_TEXT_TYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "application/vnd.api+json",
+        "image/svg+xml",
+    }
+)
+
+_COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "application/x-ndjson",
+        "application/vnd.columnar+json",
+        "application/vnd.apache.arrow.stream",
+        "image/svg+xml",
+    }
+)
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[], bytes], Callable[[], bytes]]
+
+
+def _level(encoding: str) -> int:
+    return int(os.getenv(f"COMPRESSION_LEVEL_{encoding.upper()}", str(DEFAULT_LEVELS[encoding])))
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order."""
+    installed = {GZIP: True, BROTLI: brotli is not None, ZSTD: zstandard is not None}
+    preference = os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip")
+    return [e for e in (p.strip().lower() for p in preference.split(",")) if installed.get(e)]
+
+
+def enabled() -> bool:
+    return os.getenv("COMPRESSION", "true").strip().lower() in {"1", "true", "yes"}
+
+
+def min_bytes() -> int:
+    return int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best encoding for an ``Accept-Encoding`` header, or None (identity)."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[fields[0].lower()] = q
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    if not mimetype:
+        return False
+    mimetype = mimetype.split(";", 1)[0].strip().lower()
+    return mimetype.startswith("text/") or mimetype in _COMPRESSIBLE_TYPES
+
+
+def _codec(encoding: str, level: Optional[int] = None) -> Codec:
+    """(compress, sync flush, finish) for a new compression stream."""
+    if level is None:
+        level = _level(encoding)
+    if encoding == GZIP:
+        obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 16+15: gzip container
+        return obj.compress, lambda: obj.flush(zlib.Z_SYNC_FLUSH), obj.flush
+    if encoding == BROTLI and brotli is not None:
+        obj = brotli.Compressor(quality=level)
+        return obj.process, obj.flush, obj.finish
+    if encoding == ZSTD and zstandard is not None:
+        obj = zstandard.ZstdCompressor(level=level).compressobj()
+        return obj.compress, lambda: obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), obj.flush
+    raise ValueError(f"unsupported encoding: {encoding}")
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compress_, _, finish = _codec(encoding, level)
+    return compress_(data) + finish()
+
+
+def compress_chunks(
+    chunks: Iterable[Union[bytes, str]], encoding: str, level: Optional[int] = None
+) -> Iterator[bytes]:
+    """Compress a response stream, flushing after every chunk."""
+    compress_, flush, finish = _codec(encoding, level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = compress_(chunk) + flush()
+        if out:
+            yield out
+    tail = finish()
+    if tail:
+        yield tail
+
+
+def _worth_it(raw_size: int, compressed_size: int, base64_body: bool) -> bool:
+    return compressed_size * (_BASE64_OVERHEAD if base64_body else 1) < raw_size
+
+
+def _lambda_text(mimetype: Optional[str]) -> bool:
+    """Whether serverless_wsgi sends an unencoded body of this type as text (not base64)."""
+    mimetype = (mimetype or "text/plain").split(";", 1)[0].strip().lower()
+    return mimetype.startswith("text/") or mimetype in _LAMBDA_TEXT_TYPES
+
+
+def compress_body(
+    data: bytes, mimetype: Optional[str], accept_encoding: Optional[str], base64_body: bool = False
+) -> Tuple[bytes, Optional[str]]:
+    """
+    ``(compressed, encoding)`` for a buffered body, or ``(data, None)`` when not worth it.
+
+    ``base64_body``: the body would go out as plain text, but compressed it is
+    base64-encoded (Lambda), so compressing must also beat the 4/3 overhead.
+    """
+    if not enabled() or not is_compressible(mimetype) or len(data) < min_bytes():
+        return data, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return data, None
+    body = compress(data, encoding)
+    if not _worth_it(len(data), len(body), base64_body):
+        return data, None
+    return body, encoding
+
+
+def init_compression(app, base64_body: Optional[bool] = None) -> None:
+    """
+    Compress responses of ``app``. Call it before any other ``init_*`` hook:
+    ``after_request`` functions run in reverse order, so this one runs last and
+    sees the final body and headers (ETag included).
+
+    ``base64_body`` defaults to True on Lambda (``AWS_LAMBDA_FUNCTION_NAME``);
+    the base64 overhead then counts for the types sent as text only.
+    """
+    from flask import request  # noqa: WPS433 (runtime import)
+
+    if not enabled():
+        return
+    if base64_body is None:
+        base64_body = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+    @app.after_request
+    def _compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+            or not is_compressible(response.mimetype)
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        accept_encoding = request.headers.get("Accept-Encoding")
+
+        if response.is_streamed:
+            encoding = negotiate_encoding(accept_encoding)
+            if encoding is None:
+                return response
+            response.response = compress_chunks(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            body, encoding = compress_body(
+                response.get_data(),
+                response.mimetype,
+                accept_encoding,
+                base64_body and _lambda_text(response.mimetype),
+            )
+            if encoding is None:
+                return response
+            response.set_data(body)
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Same representation, different bytes.
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def asgi_send(scope: Dict[str, Any], send: Callable[[Dict[str, Any]], Awaitable[None]]):
+    """
+    Wrap an ASGI ``send`` so the response is compressed. The start message is
+    held back until the first body message: a single small body goes out
+    as-is, a streamed one (``more_body``) is compressed chunk by chunk.
+    """
+    if not enabled():
+        return send
+    accept = ""
+    for key, value in scope.get("headers", []):
+        if key.lower() == b"accept-encoding":
+            accept = value.decode("latin-1")
+    encoding = negotiate_encoding(accept)
+    if encoding is None:
+        return send
+    threshold = min_bytes()
+    state: Dict[str, Any] = {"start": None, "codec": None}
+
+    async def _send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            state["start"] = message
+            return
+        if message["type"] != "http.response.body":
+            return await send(message)
+
+        start = state.pop("start", None)
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if start is not None:
+            headers = [(k.lower(), v) for k, v in start.get("headers", [])]
+            names = {k for k, _ in headers}
+            mimetype = next((v.decode("latin-1") for k, v in headers if k == b"content-type"), "")
+            if (
+                200 <= start["status"] < 300
+                and start["status"] != 204
+                and b"content-encoding" not in names
+                and is_compressible(mimetype)
+                and (more_body or len(body) >= threshold)
+            ):
+                # Same representation, different bytes: a strong ETag becomes weak.
+                encoded = [
+                    (k, b"W/" + v if k == b"etag" and not v.startswith(b"W/") else v)
+                    for k, v in headers
+                    if k != b"content-length"
+                ]
+                encoded += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                if more_body:
+                    state["codec"] = _codec(encoding)
+                    headers = encoded
+                else:
+                    compressed = compress(body, encoding)
+                    if _worth_it(len(body), len(compressed), base64_body=False):
+                        encoded.append((b"content-length", str(len(compressed)).encode()))
+                        await send({**start, "headers": encoded})
+                        return await send({**message, "body": compressed})
+            await send({**start, "headers": headers})
+
+        codec = state["codec"]
+        if codec is None:
+            return await send(message)
+        compress_, flush, finish = codec
+        out = compress_(body) + (flush() if more_body else finish())
+        await send({**message, "body": out})
+
+    return _send
@@ -6,29 +6,84 @@ Database connection helper.
 - Uses PostgreSQL when DB_* env vars are provided
 - Falls back to SQLite (memory) for local/dev
 - Safe for AWS Lambda (low pool size)
+- Optional read replica: reads go to the reader endpoint, writes to the writer,
+  and a request that has written keeps reading from the writer (read-your-writes)
+
+Reader endpoint (first match wins, otherwise reads use the writer):
+- DB_READER_URL
+- ``reader_host`` / ``host_ro`` key in the DB secret (same credentials)
+- DB_READER_HOST (same credentials/port/name as the writer)
+
+Credentials from DB_SECRET_ARN are read through ``common.secrets_cache``
+(TTL + stale-while-revalidate) on every new connection; an authentication
+failure after a rotation refreshes the secret and retries the connect once.
+
+Connection mode (DB_CONNECTION_MODE):
+- ``pool`` (default): QueuePool with ``pool_pre_ping`` on every checkout
+- ``lambda``: one pooled connection per engine, opened during the init phase
+  (:func:`warm_up`); a checkout only pings when the connection has been idle
+  longer than DB_PING_IDLE_SECONDS (default 30)
+- ``proxy``: NullPool, for RDS Proxy (the proxy owns pooling; no pre-ping)
+
+Connect time and query time are measured separately per request
+(:func:`db_timings`, ``Server-Timing`` header via :func:`init_db_timings`).
+
+Pool metrics (see ``common.metrics``, dimension ``Pool=writer|reader``):
+``pool.checkout_wait_ms``, ``pool.checked_out`` and ``pool.overflow``
+histograms sampled on every checkout; ``pool.connects``,
+``pool.invalidations``, ``pool.recycles`` and ``pool.ping_failures``
+counters; ``pool.connect_ms`` histogram. The async engines of
+``conexao_banco_async`` (ECS) report the same metrics.
 """
 
 import os
 from contextlib import contextmanager
-from typing import Optional
+from contextvars import ContextVar
+from typing import Dict, Optional
 import logging
-import json
-from functools import lru_cache
-
-import boto3
+import threading
+import time
 
 import sqlalchemy as sa
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from . import sql_profiler
+from .metrics import metrics
+from .secrets_cache import secrets_cache
 
 _ENGINE: Optional[sa.Engine] = None
 _SessionLocal: Optional[sessionmaker] = None
+_READER_ENGINE: Optional[sa.Engine] = None
+_ReaderSessionLocal: Optional[sessionmaker] = None
+# Engines are created once, even when the warm-up thread and a request (or a
+# slow secret fetch) race for the first one. Reentrant: the reader may fall
+# back to the writer.
+_ENGINE_LOCK = threading.RLock()
+
+# True once the current request has written: its reads then go to the writer.
+_READ_FROM_WRITER: ContextVar[bool] = ContextVar("read_from_writer", default=False)
 
+MODE_POOL = "pool"
+MODE_LAMBDA = "lambda"
+MODE_PROXY = "proxy"
+CONNECTION_MODES = (MODE_POOL, MODE_LAMBDA, MODE_PROXY)
 
-def _build_db_url() -> str:
+# Per-request DB timings (None outside a request scope).
+_DB_TIMINGS: ContextVar[Optional[Dict[str, float]]] = ContextVar("db_timings", default=None)
+
+
+def _build_db_url(reader: bool = False, secret_password: bool = True) -> Optional[str]:
     """
     Build DB URL from environment variables.
+
+    With ``reader=True`` return the read replica URL, or ``None`` when no
+    reader endpoint is configured. With ``secret_password=False`` a URL built
+    from the DB secret leaves the password out, for engines that take it from
+    the cache on every connect (:func:`_use_secret_credentials`).
     """
-    db_url = os.getenv("DB_URL")
+    db_url = os.getenv("DB_READER_URL" if reader else "DB_URL")
     if db_url:
         return db_url
 
@@ -38,17 +93,21 @@ def _build_db_url() -> str:
         try:
             creds = _read_db_secret(secret_id)
             host = creds.get("host")
+            if reader:
+                host = creds.get("reader_host") or creds.get("host_ro") or os.getenv("DB_READER_HOST")
             port = str(creds.get("port")) if creds.get("port") is not None else None
             name = creds.get("dbname") or creds.get("database")
             user = creds.get("username") or creds.get("user")
             password = creds.get("password")
             if all([host, port, name, user, password]):
+                if not secret_password:
+                    return f"postgresql+psycopg2://{user}@{host}:{port}/{name}"
                 return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}"
         except Exception:
             # Fall back to env vars below (do not crash during import).
             logging.getLogger(__name__).exception("Failed to load DB secret")
 
-    host = os.getenv("DB_HOST")
+    host = os.getenv("DB_READER_HOST" if reader else "DB_HOST")
     port = os.getenv("DB_PORT")
     name = os.getenv("DB_NAME")
     user = os.getenv("DB_USER")
@@ -57,36 +116,111 @@ def _build_db_url() -> str:
     if all([host, port, name, user, password]):
         return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{name}"
 
+    if reader:
+        return None
     return "sqlite+pysqlite:///:memory:"
 
 
-@lru_cache(maxsize=2)
-def _read_db_secret(secret_id: str) -> dict:
-    """Read and cache a Secrets Manager JSON secret."""
-    sm = boto3.client("secretsmanager")
-    resp = sm.get_secret_value(SecretId=secret_id)
-    s = resp.get("SecretString")
-    if not s:
-        raise ValueError("SecretString is empty")
-    obj = json.loads(s)
+def _read_db_secret(secret_id: str, refresh: bool = False) -> dict:
+    """Read a Secrets Manager JSON secret through the shared TTL cache."""
+    obj = secrets_cache.refresh(secret_id) if refresh else secrets_cache.get(secret_id)
     if not isinstance(obj, dict):
         raise ValueError("Secret JSON must be an object")
     # Normalize keys to lower-case for flexibility
     return {str(k).lower(): v for k, v in obj.items()}
 
 
-def get_engine() -> sa.Engine:
+def _db_secret_id(reader: bool = False) -> Optional[str]:
+    """Secret the URL is built from (None when DB_URL / DB_READER_URL overrides it)."""
+    if os.getenv("DB_READER_URL" if reader else "DB_URL"):
+        return None
+    return os.getenv("DB_SECRET_ARN")
+
+
+# invalid_password / invalid_authorization_specification
+_AUTH_FAILURE_CODES = {"28P01", "28000"}
+
+
+def _is_auth_failure(exc: Exception) -> bool:
+    # pgcode: psycopg2; sqlstate: asyncpg (raised unwrapped at connect).
+    if getattr(exc, "pgcode", None) in _AUTH_FAILURE_CODES or getattr(exc, "sqlstate", None) in _AUTH_FAILURE_CODES:
+        return True
+    # psycopg2 raises connect-time errors without a pgcode.
+    return "authentication failed" in str(exc).lower()
+
+
+def _use_secret_credentials(engine: sa.Engine, secret_id: str) -> None:
     """
-    Return a singleton SQLAlchemy Engine.
+    Take user/password from the cached secret on every new connection.
+
+    After a rotation the first connect fails authentication; the secret is
+    then refreshed and the connect retried once, so the engine picks up the
+    new password in place (no cold start, pooled connections are kept).
+    Async engines register it on their ``sync_engine``.
     """
-    global _ENGINE, _SessionLocal
+    log = logging.getLogger(__name__)
+
+    def _apply(cparams, creds):
+        user = creds.get("username") or creds.get("user")
+        password = creds.get("password")
+        if user:
+            cparams["user"] = user
+        if password:
+            cparams["password"] = password
+
+    @event.listens_for(engine, "do_connect")
+    def _connect_with_secret(dialect, conn_rec, cargs, cparams):
+        try:
+            _apply(cparams, _read_db_secret(secret_id))
+        except Exception:
+            log.exception("Failed to load DB secret; using the last known credentials")
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception as exc:
+            if not _is_auth_failure(exc):
+                raise
+            log.warning("DB authentication failed; refreshing credentials", extra={"secret_id": secret_id})
+            metrics.count("db.credential_refreshes")
+            _apply(cparams, _read_db_secret(secret_id, refresh=True))
+            return dialect.connect(*cargs, **cparams)
+
+
+def connection_mode() -> str:
+    mode = os.getenv("DB_CONNECTION_MODE", MODE_POOL).strip().lower()
+    if mode not in CONNECTION_MODES:
+        logging.getLogger(__name__).warning(
+            "Unknown DB_CONNECTION_MODE, using 'pool'", extra={"db_connection_mode": mode}
+        )
+        return MODE_POOL
+    return mode
 
-    if _ENGINE is not None:
-        return _ENGINE
 
-    db_url = _build_db_url()
+class _CheckoutWaitMixin:
+    """Records how long a checkout waited for a connection (``pool.checkout_wait_ms``)."""
 
-    kwargs: dict = {"pool_pre_ping": True}
+    def _do_get(self):
+        started = time.perf_counter()
+        rec = super()._do_get()
+        waited_ms = (time.perf_counter() - started) * 1000
+        # Opening an overflow connection is connect time, not queueing.
+        waited_ms -= rec.record_info.pop("connect_ms", 0.0)
+        rec.record_info["checkout_wait_ms"] = max(waited_ms, 0.0)
+        return rec
+
+
+class InstrumentedQueuePool(_CheckoutWaitMixin, QueuePool):
+    """QueuePool that records how long a checkout waited for a connection."""
+
+
+class InstrumentedAsyncQueuePool(_CheckoutWaitMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool counterpart of :class:`InstrumentedQueuePool` (async engines)."""
+
+
+def _create_engine(db_url: str, role: str = "writer") -> sa.Engine:
+    mode = connection_mode()
+    # lambda mode pings only idle connections (see _ping_if_idle); proxy mode
+    # always gets a fresh connection from NullPool.
+    kwargs: dict = {"pool_pre_ping": mode == MODE_POOL}
 
     # Fast-fail DB connects so Lambda doesn't hit its own timeout.
     connect_timeout = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
@@ -97,15 +231,21 @@ def get_engine() -> sa.Engine:
         kwargs["connect_args"] = connect_args
 
     if not db_url.startswith("sqlite"):
-        kwargs.update(
-            pool_size=int(os.getenv("DB_POOL_SIZE", "2")),
-            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "2")),
-            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),
-        )
+        if mode == MODE_PROXY:
+            kwargs["poolclass"] = NullPool
+        else:
+            # A Lambda environment serves one request at a time.
+            default_size, default_overflow = ("1", "1") if mode == MODE_LAMBDA else ("2", "2")
+            kwargs.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=int(os.getenv("DB_POOL_SIZE", default_size)),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", default_overflow)),
+                pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),
+            )
 
     log = logging.getLogger(__name__)
     try:
-        _ENGINE = sa.create_engine(db_url, **kwargs)
+        engine = sa.create_engine(db_url, **kwargs)
     except Exception:
         # Do not leak secrets in logs.
         safe_url = db_url
@@ -114,11 +254,254 @@ def get_engine() -> sa.Engine:
             safe_url = "***@" + rest
         log.exception("Failed to create SQLAlchemy engine", extra={"db_url": safe_url})
         raise
-    _SessionLocal = sessionmaker(bind=_ENGINE, autoflush=False, autocommit=False)
+
+    _instrument(engine, role, ping_idle=mode == MODE_LAMBDA)
+    return engine
+
+
+def _instrument(engine: sa.Engine, role: str, ping_idle: bool) -> None:
+    """Attach connect/query timing, pool metrics and (lambda mode) the idle-only ping."""
+    log = logging.getLogger(__name__)
+
+    @event.listens_for(engine, "do_connect")
+    def _connect_started(dialect, conn_rec, cargs, cparams):
+        conn_rec.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "connect")
+    def _connected(dbapi_conn, conn_rec):
+        started = conn_rec.info.pop("connect_started", None)
+        conn_rec.info["last_used"] = time.monotonic()
+        metrics.count("pool.connects", Pool=role)
+        # record_info outlives the DBAPI connection: a reconnect of the same
+        # record that was not caused by an invalidation is a recycle.
+        if conn_rec.record_info.get("connected") and not conn_rec.record_info.pop("invalidated", False):
+            metrics.count("pool.recycles", Pool=role)
+        conn_rec.record_info["connected"] = True
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        conn_rec.record_info["connect_ms"] = elapsed_ms
+        _record("connect", elapsed_ms)
+        metrics.observe("pool.connect_ms", elapsed_ms, Pool=role)
+        log.info("DB connect", extra={"connect_ms": round(elapsed_ms, 2), "db_host": engine.url.host})
+
+    @event.listens_for(engine, "checkout")
+    def _checked_out(dbapi_conn, conn_rec, conn_proxy):
+        conn_rec.record_info.pop("connect_ms", None)
+        waited_ms = conn_rec.record_info.pop("checkout_wait_ms", None)
+        if waited_ms is not None:
+            metrics.observe("pool.checkout_wait_ms", waited_ms, Pool=role)
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            metrics.observe("pool.checked_out", pool.checkedout(), unit="Count", Pool=role)
+            metrics.observe("pool.overflow", max(pool.overflow(), 0), unit="Count", Pool=role)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidated(dbapi_conn, conn_rec, exception):
+        conn_rec.record_info["invalidated"] = True
+        metrics.count("pool.invalidations", Pool=role)
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _soft_invalidated(dbapi_conn, conn_rec, exception):
+        conn_rec.record_info["invalidated"] = True
+        metrics.count("pool.invalidations", Pool=role)
+
+    @event.listens_for(engine, "handle_error")
+    def _ping_failed(context):
+        if context.is_pre_ping:
+            metrics.count("pool.ping_failures", Pool=role)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            _record("query", (time.perf_counter() - started) * 1000)
+
+    if sql_profiler.enabled():
+        sql_profiler.profiler.attach(engine)
+
+    if not ping_idle:
+        return
+
+    idle_seconds = float(os.getenv("DB_PING_IDLE_SECONDS", "30"))
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_conn, conn_rec, conn_proxy):
+        last_used = conn_rec.info.get("last_used")
+        if last_used is not None and time.monotonic() - last_used < idle_seconds:
+            return
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as exc:
+            metrics.count("pool.ping_failures", Pool=role)
+            # The pool discards this connection and retries with a new one.
+            raise sa.exc.DisconnectionError() from exc
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    @event.listens_for(engine, "checkin")
+    def _mark_used(dbapi_conn, conn_rec):
+        conn_rec.info["last_used"] = time.monotonic()
+
+
+def _record(kind: str, elapsed_ms: float) -> None:
+    timings = _DB_TIMINGS.get()
+    if timings is None:
+        return
+    timings[f"{kind}_count"] += 1
+    timings[f"{kind}_ms"] += elapsed_ms
+
+
+def reset_db_timings() -> None:
+    """Start a new timing scope (call at the beginning of every request)."""
+    _DB_TIMINGS.set({"connect_count": 0, "connect_ms": 0.0, "query_count": 0, "query_ms": 0.0})
+
+
+def db_timings() -> Dict[str, float]:
+    """Connect vs. query time of the current request (zeros outside a request)."""
+    timings = _DB_TIMINGS.get()
+    if timings is None:
+        return {"connect_count": 0, "connect_ms": 0.0, "query_count": 0, "query_ms": 0.0}
+    return dict(timings)
+
+
+def server_timing() -> str:
+    """``Server-Timing`` header value for the current request's DB time."""
+    t = db_timings()
+    return (
+        f"db-connect;dur={t['connect_ms']:.1f};desc=\"{t['connect_count']}\", "
+        f"db-query;dur={t['query_ms']:.1f};desc=\"{t['query_count']}\""
+    )
+
+
+def init_db_timings(app) -> None:
+    """Measure DB time per Flask request and report it as a ``Server-Timing`` header."""
+    app.before_request(reset_db_timings)
+
+    @app.after_request
+    def _server_timing(response):
+        response.headers.add("Server-Timing", server_timing())
+        return response
+
+
+def warm_up_enabled() -> bool:
+    default = "false" if connection_mode() == MODE_POOL else "true"
+    return os.getenv("DB_WARMUP", default).strip().lower() in {"1", "true", "yes"}
+
+
+def warm_up(budget_ms: Optional[int] = None) -> bool:
+    """
+    Open the writer (and reader) connection during the Lambda init phase.
+
+    These are the engines every caller shares (repositories and the auth user
+    lookup alike), so the first request finds its connections open.
+
+    Connects from a daemon thread and waits at most ``budget_ms``
+    (DB_WARMUP_BUDGET_MS, default 1500) so a slow database never stretches
+    the init phase past its budget; a connect still in flight finishes in the
+    background and lands in the pool. Returns True when warm-up completed.
+    """
+    if budget_ms is None:
+        budget_ms = int(os.getenv("DB_WARMUP_BUDGET_MS", "1500"))
+    log = logging.getLogger(__name__)
+    started = time.perf_counter()
+
+    def _connect_all():
+        try:
+            engines = {id(e): e for e in (get_engine(), get_reader_engine())}
+            for engine in engines.values():
+                with engine.connect():
+                    pass
+        except Exception:
+            log.exception("DB warm-up failed")
+
+    worker = threading.Thread(target=_connect_all, name="db-warm-up", daemon=True)
+    worker.start()
+    worker.join(budget_ms / 1000)
+    done = not worker.is_alive()
+    log.info(
+        "DB warm-up",
+        extra={"warm_up_ms": round((time.perf_counter() - started) * 1000, 2), "completed": done},
+    )
+    return done
+
+
+def get_engine() -> sa.Engine:
+    """
+    Return a singleton SQLAlchemy Engine (writer).
+    """
+    global _ENGINE, _SessionLocal
+
+    if _ENGINE is not None:
+        return _ENGINE
+
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            return _ENGINE
+        engine = _create_engine(_build_db_url(), role="writer")
+        secret_id = _db_secret_id()
+        if secret_id and engine.dialect.name == "postgresql":
+            _use_secret_credentials(engine, secret_id)
+        # Published last: a caller that sees the engine also sees the session factory.
+        _SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        _ENGINE = engine
 
     return _ENGINE
 
 
+def get_reader_engine() -> sa.Engine:
+    """
+    Return the read replica Engine, or the writer Engine when no reader is configured.
+    """
+    global _READER_ENGINE, _ReaderSessionLocal
+
+    if _READER_ENGINE is not None:
+        return _READER_ENGINE
+
+    with _ENGINE_LOCK:
+        if _READER_ENGINE is not None:
+            return _READER_ENGINE
+        reader_url = _build_db_url(reader=True)
+        if reader_url:
+            engine = _create_engine(reader_url, role="reader")
+            secret_id = _db_secret_id(reader=True)
+            if secret_id and engine.dialect.name == "postgresql":
+                _use_secret_credentials(engine, secret_id)
+        else:
+            engine = get_engine()
+        _ReaderSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        _READER_ENGINE = engine
+
+    return _READER_ENGINE
+
+
+def mark_written() -> None:
+    """Record that the current request wrote, so its later reads use the writer."""
+    _READ_FROM_WRITER.set(True)
+
+
+def reads_from_writer() -> bool:
+    return _READ_FROM_WRITER.get()
+
+
+def reset_read_your_writes() -> None:
+    """Start a new request scope (call at the beginning of every request)."""
+    _READ_FROM_WRITER.set(False)
+
+
+def init_read_your_writes(app) -> None:
+    """Reset read-your-writes stickiness at the start of every Flask request."""
+    app.before_request(reset_read_your_writes)
+
+
 @contextmanager
 def get_session():
     """
@@ -138,3 +521,37 @@ def get_session():
         raise
     finally:
         session.close()
+
+
+@contextmanager
+def get_read_session():
+    """
+    Read-only SQLAlchemy session on the reader engine.
+
+    Never commits (the transaction is rolled back on close). Uses the writer
+    when the current request has already written.
+    """
+    if reads_from_writer():
+        if _SessionLocal is None:
+            get_engine()
+        factory = _SessionLocal
+    else:
+        if _ReaderSessionLocal is None:
+            get_reader_engine()
+        factory = _ReaderSessionLocal
+
+    session = factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def read_connection():
+    """
+    Read-only Connection on the reader engine (writer after a write in this request).
+    """
+    engine = get_engine() if reads_from_writer() else get_reader_engine()
+    with engine.connect() as conn:
+        yield conn
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+"""
+Asyncio variant of the database connection helper.
+
+Same configuration as ``conexao_banco`` (DB_URL / DB secret / DB_* env vars and
+the optional reader endpoint, DB secret credentials read from the cache on
+every connect), with the driver swapped for its asyncio counterpart:
+
+- postgresql+psycopg2 -> postgresql+asyncpg
+- sqlite(+pysqlite)   -> sqlite+aiosqlite
+
+Used by the ASGI entry point of the ECS service; the Lambda path stays on the
+sync helpers. The engines carry the same pool metrics and connect/query
+timings as the sync ones (instrumented through their ``sync_engine``).
+"""
+
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import logging
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from .conexao_banco import (
+    InstrumentedAsyncQueuePool,
+    _build_db_url,
+    _db_secret_id,
+    _instrument,
+    _use_secret_credentials,
+    reads_from_writer,
+)
+
+_ASYNC_ENGINE: Optional[AsyncEngine] = None
+_ASYNC_READER_ENGINE: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+_AsyncReaderSessionLocal: Optional[async_sessionmaker] = None
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(db_url: str) -> str:
+    """Swap the driver of a sync DB URL for its asyncio counterpart."""
+    url = sa.engine.make_url(db_url)
+    driver = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _create_async_engine(db_url: str, role: str = "writer", secret_id: Optional[str] = None) -> AsyncEngine:
+    async_url = to_async_url(db_url)
+    kwargs: dict = {"pool_pre_ping": True}
+
+    if not async_url.startswith("sqlite"):
+        # asyncpg uses 'timeout' (seconds) for the connect phase
+        kwargs["connect_args"] = {"timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "3"))}
+        kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool,
+            # Many queries in flight per worker: size the pool for concurrency, not workers.
+            pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", os.getenv("DB_POOL_SIZE", "10"))),
+            max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", os.getenv("DB_MAX_OVERFLOW", "5"))),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),
+        )
+
+    try:
+        engine = create_async_engine(async_url, **kwargs)
+    except Exception:
+        # Do not leak secrets in logs.
+        safe_url = sa.engine.make_url(async_url).render_as_string(hide_password=True)
+        logging.getLogger(__name__).exception(
+            "Failed to create async SQLAlchemy engine", extra={"db_url": safe_url}
+        )
+        raise
+
+    # Pool events fire on the sync facade; pre-ping covers every checkout.
+    _instrument(engine.sync_engine, role, ping_idle=False)
+    if secret_id and engine.dialect.name == "postgresql":
+        # Credentials come from the secrets cache on every connect, so a
+        # rotated password is picked up without restarting the container.
+        _use_secret_credentials(engine.sync_engine, secret_id)
+    return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Return a singleton AsyncEngine (writer).
+    """
+    global _ASYNC_ENGINE, _AsyncSessionLocal
+
+    if _ASYNC_ENGINE is not None:
+        return _ASYNC_ENGINE
+
+    _ASYNC_ENGINE = _create_async_engine(
+        _build_db_url(secret_password=False), secret_id=_db_secret_id()
+    )
+    _AsyncSessionLocal = async_sessionmaker(bind=_ASYNC_ENGINE, autoflush=False, expire_on_commit=False)
+    return _ASYNC_ENGINE
+
+
+def get_async_reader_engine() -> AsyncEngine:
+    """
+    Return the read replica AsyncEngine, or the writer when no reader is configured.
+    """
+    global _ASYNC_READER_ENGINE, _AsyncReaderSessionLocal
+
+    if _ASYNC_READER_ENGINE is not None:
+        return _ASYNC_READER_ENGINE
+
+    reader_url = _build_db_url(reader=True, secret_password=False)
+    _ASYNC_READER_ENGINE = (
+        _create_async_engine(reader_url, role="reader", secret_id=_db_secret_id(reader=True))
+        if reader_url
+        else get_async_engine()
+    )
+    _AsyncReaderSessionLocal = async_sessionmaker(
+        bind=_ASYNC_READER_ENGINE, autoflush=False, expire_on_commit=False
+    )
+    return _ASYNC_READER_ENGINE
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    AsyncSession context manager (commits on success, rolls back on error).
+    """
+    if _AsyncSessionLocal is None:
+        get_async_engine()
+
+    session = _AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+@asynccontextmanager
+async def get_async_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Read-only AsyncSession on the reader (never commits).
+    """
+    if reads_from_writer():
+        if _AsyncSessionLocal is None:
+            get_async_engine()
+        factory = _AsyncSessionLocal
+    else:
+        if _AsyncReaderSessionLocal is None:
+            get_async_reader_engine()
+        factory = _AsyncReaderSessionLocal
+
+    session = factory()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def dispose_async_engines() -> None:
+    """Close pooled connections (call on ASGI shutdown)."""
+    global _ASYNC_ENGINE, _ASYNC_READER_ENGINE, _AsyncSessionLocal, _AsyncReaderSessionLocal
+
+    for engine in {id(e): e for e in (_ASYNC_READER_ENGINE, _ASYNC_ENGINE) if e is not None}.values():
+        await engine.dispose()
+    _ASYNC_ENGINE = _ASYNC_READER_ENGINE = None
+    _AsyncSessionLocal = _AsyncReaderSessionLocal = None
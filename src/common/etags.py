@@ -0,0 +1,40 @@
+"""ETags for conditional GETs on list endpoints.
+
+An ETag is derived from a table's change watermark
+(``GenericCrudRepository.table_version``) and everything else that shapes the
+response (query parameters, negotiated format). A poll that sends the ETag
+back in ``If-None-Match`` costs one version lookup instead of the count and
+page queries, and gets ``304 Not Modified`` while the table is unchanged.
+
+ETags are generated strong. Compression (``common.compression``) turns them
+weak, so matching uses the weak comparison (RFC 9110, 13.1.2).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+import hashlib
+
+# Revalidate on every use: a cached page is only reused after a 304.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(version: str, *parts: Any) -> str:
+    """Opaque (unquoted) ETag for ``version`` plus the response-shaping ``parts``."""
+    digest = hashlib.sha256(repr((version, parts)).encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True when an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
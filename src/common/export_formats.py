@@ -0,0 +1,99 @@
+"""Chunked NDJSON / CSV writers for streaming exports.
+
+The writers take the column names once and an iterator of row tuples (as
+yielded by ``GenericCrudRepository.iter_rows``) and yield text chunks of
+``rows_per_chunk`` rows, so a response can be streamed without holding the
+whole result in memory. :func:`aexport_chunks` does the same for async row
+iterators (ASGI path).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+import csv
+import io
+import json
+import uuid
+
+# (columns, rows, first_batch) -> text
+Encoder = Callable[[Sequence[str], Sequence[Sequence[Any]], bool], str]
+
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_JSON = json.JSONEncoder(default=json_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def encode_ndjson(columns: Sequence[str], rows: Sequence[Sequence[Any]], first_batch: bool) -> str:
+    """One JSON object per line."""
+    if not rows:
+        return ""
+    return "\n".join(_JSON.encode(dict(zip(columns, row))) for row in rows) + "\n"
+
+
+def encode_csv(columns: Sequence[str], rows: Sequence[Sequence[Any]], first_batch: bool) -> str:
+    """RFC 4180 CSV; the header row is written with the first batch."""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if first_batch:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow(_csv_value(v) for v in row)
+    return out.getvalue()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def export_chunks(
+    encoder: Encoder, columns: Sequence[str], rows: Iterable[Sequence[Any]], rows_per_chunk: int = 500
+) -> Iterator[str]:
+    first = True
+    batch: List[Sequence[Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= rows_per_chunk:
+            yield encoder(columns, batch, first)
+            first, batch = False, []
+    if batch or first:
+        chunk = encoder(columns, batch, first)
+        if chunk:
+            yield chunk
+
+
+async def aexport_chunks(
+    encoder: Encoder, columns: Sequence[str], rows: AsyncIterable[Sequence[Any]], rows_per_chunk: int = 500
+) -> AsyncIterator[str]:
+    first = True
+    batch: List[Sequence[Any]] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= rows_per_chunk:
+            yield encoder(columns, batch, first)
+            first, batch = False, []
+    if batch or first:
+        chunk = encoder(columns, batch, first)
+        if chunk:
+            yield chunk
+
+
+# format name -> (mimetype, encoder)
+EXPORT_FORMATS: Dict[str, Tuple[str, Encoder]] = {
+    "ndjson": ("application/x-ndjson", encode_ndjson),
+    "csv": ("text/csv", encode_csv),
+}
@@ -0,0 +1,155 @@
+"""JWKS signing-key store that never fetches on the request path.
+
+Replaces a lazily created ``PyJWKClient`` (HTTPS fetch inside the first
+authenticated request, and again inline for every unknown ``kid``):
+
+- keys are loaded at init from a JWKS document bundled with the deployment
+  (JWKS_FILE, written by ``scripts/fetch_jwks.py``) and/or prefetched from
+  the issuer within a time budget (:meth:`JwksKeyStore.prefetch`)
+- once the key set is older than JWKS_REFRESH_SECONDS (default 3600) it is
+  refreshed by a background thread while the current keys keep serving
+- an unknown ``kid`` fails that verification immediately and schedules a
+  background refetch, at most once per JWKS_MIN_REFETCH_SECONDS (default 30)
+
+``fetch`` is injectable so the store can be exercised offline with a local
+key pair.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+
+import jwt
+from jwt import PyJWK, PyJWKClientError, PyJWKSet
+
+
+class JwksKeyStore:
+    def __init__(
+        self,
+        issuer: str,
+        bundled_path: Optional[str] = None,
+        refresh_interval: float = 3600.0,
+        min_refetch_interval: float = 30.0,
+        fetch: Optional[Callable[[], Dict[str, Any]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.jwks_url = issuer.rstrip("/") + "/.well-known/jwks.json"
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self._fetch = fetch or self._fetch_url
+        self._clock = clock
+        self._keys: Dict[str, PyJWK] = {}
+        self._loaded_at: Optional[float] = None
+        self._last_fetch_started: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._log = logging.getLogger(__name__)
+        if bundled_path:
+            self.load_file(bundled_path)
+
+    @classmethod
+    def from_env(cls, issuer: str) -> "JwksKeyStore":
+        return cls(
+            issuer,
+            bundled_path=os.getenv("JWKS_FILE"),
+            refresh_interval=float(os.getenv("JWKS_REFRESH_SECONDS", "3600")),
+            min_refetch_interval=float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30")),
+        )
+
+    # -- loading -----------------------------------------------------------
+
+    def load_file(self, path: str) -> bool:
+        """Load a bundled JWKS document; a missing or invalid file is logged and ignored."""
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                self._set_keys(json.load(fh))
+            return True
+        except FileNotFoundError:
+            self._log.warning("JWKS file not found", extra={"path": path})
+        except Exception:
+            self._log.exception("Failed to load JWKS file", extra={"path": path})
+        return False
+
+    def _set_keys(self, jwks: Dict[str, Any]) -> None:
+        keys = {k.key_id: k for k in PyJWKSet.from_dict(jwks).keys if k.key_id}
+        with self._lock:
+            self._keys = keys
+            self._loaded_at = self._clock()
+
+    def _fetch_url(self) -> Dict[str, Any]:
+        timeout = float(os.getenv("JWKS_FETCH_TIMEOUT", "5"))
+        with urllib.request.urlopen(self.jwks_url, timeout=timeout) as resp:
+            return json.load(resp)
+
+    def refresh(self) -> bool:
+        """Fetch the key set now (blocking; call from init or a background thread)."""
+        with self._lock:
+            self._last_fetch_started = self._clock()
+        try:
+            self._set_keys(self._fetch())
+            return True
+        except Exception:
+            # Keep serving the keys we have.
+            self._log.exception("JWKS fetch failed", extra={"jwks_url": self.jwks_url})
+            return False
+
+    def prefetch(self, budget_ms: Optional[int] = None) -> bool:
+        """
+        Fetch at init, waiting at most ``budget_ms`` (JWKS_PREFETCH_BUDGET_MS,
+        default 2000); a slower fetch completes in the background. With a
+        bundled key set loaded, the fetch is not waited for at all.
+        """
+        if budget_ms is None:
+            budget_ms = int(os.getenv("JWKS_PREFETCH_BUDGET_MS", "2000"))
+        worker = self._refresh_in_background(force=True)
+        if worker is not None and not self._keys:
+            worker.join(budget_ms / 1000)
+        return bool(self._keys)
+
+    def _refresh_in_background(self, force: bool = False) -> Optional[threading.Thread]:
+        now = self._clock()
+        with self._lock:
+            if self._refreshing:
+                return None
+            last = self._last_fetch_started
+            if not force and last is not None and now - last < self.min_refetch_interval:
+                return None
+            self._refreshing = True
+            self._last_fetch_started = now
+
+        def _run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        worker = threading.Thread(target=_run, name="jwks-refresh", daemon=True)
+        worker.start()
+        return worker
+
+    # -- lookup (request path: memory only) -------------------------------
+
+    def get_signing_key(self, kid: str) -> PyJWK:
+        loaded_at = self._loaded_at
+        if loaded_at is None or self._clock() - loaded_at >= self.refresh_interval:
+            self._refresh_in_background()
+        key = self._keys.get(kid)
+        if key is None:
+            # Possibly a rotated key: fetch in the background, fail this token now.
+            self._refresh_in_background()
+            raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    def get_signing_key_from_jwt(self, token: str) -> PyJWK:
+        """Same contract as ``PyJWKClient.get_signing_key_from_jwt``."""
+        return self.get_signing_key(jwt.get_unverified_header(token).get("kid"))
+
+    @property
+    def kids(self):
+        return sorted(self._keys)
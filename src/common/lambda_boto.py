@@ -1,11 +1,25 @@
 #Libs
-import boto3
+from functools import lru_cache
 import json
 
-client = boto3.client('lambda', region_name='us-east-1')
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Lambda client, created on first use."""
+    import boto3  # noqa: WPS433 (runtime import)
+
+    return boto3.client('lambda', region_name='us-east-1')
+
+
+def __getattr__(name):
+    # `lambda_boto.client` used to be a module-level client.
+    if name == 'client':
+        return get_client()
+    raise AttributeError(name)
+
 
 def invoke_lambda_async(function_name, input_lambda):
-    return client.invoke(
+    return get_client().invoke(
         FunctionName=function_name,
         InvocationType='Event',
         Payload=json.dumps(input_lambda)
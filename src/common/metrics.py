@@ -0,0 +1,229 @@
+"""Counters and histograms exported as CloudWatch Embedded Metric Format (EMF).
+
+Metrics are aggregated in process and written as EMF JSON lines on stdout,
+which CloudWatch Logs turns into metrics without any API call (Lambda and ECS
+with the awslogs driver). Histograms use the EMF ``Values``/``Counts`` form.
+
+Sink (METRICS_SINK):
+- ``emf``: EMF JSON lines (default on Lambda / ECS)
+- ``stdout``: one readable summary line per metric (default locally)
+- ``none``: drop everything
+
+Flushing: on Lambda after every request (:func:`init_metrics`), since the
+environment may be frozen afterwards; elsewhere every METRICS_FLUSH_SECONDS
+(default 60) from a background thread. Import this module as
+``src.common.metrics`` (or relatively); the process keeps one registry.
+
+Config: METRICS_NAMESPACE (default ``AwsProject``), METRICS_SERVICE (default
+the Lambda function name, else ``local``).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+SINK_EMF = "emf"
+SINK_STDOUT = "stdout"
+SINK_NONE = "none"
+
+# EMF accepts at most 100 distinct values per metric per document.
+_EMF_MAX_VALUES = 100
+
+Dimensions = Tuple[Tuple[str, str], ...]
+
+
+def _on_lambda() -> bool:
+    return bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+def _on_aws() -> bool:
+    return _on_lambda() or bool(os.getenv("ECS_CONTAINER_METADATA_URI_V4"))
+
+
+class Metrics:
+    def __init__(
+        self,
+        namespace: str = "AwsProject",
+        service: str = "local",
+        sink: str = SINK_STDOUT,
+        flush_interval: float = 60.0,
+    ):
+        self.namespace = namespace
+        self.service = service
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters: Dict[Dimensions, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # dims -> name -> value -> occurrences
+        self._histograms: Dict[Dimensions, Dict[str, Dict[float, int]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(int))
+        )
+        self._units: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        default_sink = SINK_EMF if _on_aws() else SINK_STDOUT
+        return cls(
+            namespace=os.getenv("METRICS_NAMESPACE", "AwsProject"),
+            service=os.getenv("METRICS_SERVICE") or os.getenv("AWS_LAMBDA_FUNCTION_NAME") or "local",
+            sink=os.getenv("METRICS_SINK", default_sink).strip().lower(),
+            flush_interval=float(os.getenv("METRICS_FLUSH_SECONDS", "0" if _on_lambda() else "60")),
+        )
+
+    # -- recording ---------------------------------------------------------
+
+    def count(self, name: str, value: float = 1, unit: str = "Count", **dimensions: str) -> None:
+        if self.sink == SINK_NONE:
+            return
+        dims = tuple(sorted(dimensions.items()))
+        with self._lock:
+            self._units[name] = unit
+            self._counters[dims][name] += value
+        self._ensure_flusher()
+
+    def observe(self, name: str, value: float, unit: str = "Milliseconds", **dimensions: str) -> None:
+        """Add one sample to a histogram (rounded to 0.1 to keep the value set small)."""
+        if self.sink == SINK_NONE:
+            return
+        dims = tuple(sorted(dimensions.items()))
+        with self._lock:
+            self._units[name] = unit
+            self._histograms[dims][name][round(value, 1)] += 1
+        self._ensure_flusher()
+
+    # -- export ------------------------------------------------------------
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Write and reset everything recorded so far; returns the EMF documents."""
+        with self._lock:
+            counters, self._counters = self._counters, defaultdict(lambda: defaultdict(float))
+            histograms, self._histograms = self._histograms, defaultdict(
+                lambda: defaultdict(lambda: defaultdict(int))
+            )
+            units = dict(self._units)
+            self._last_flush = time.monotonic()
+
+        docs = []
+        for dims in set(counters) | set(histograms):
+            docs.extend(self._documents(dims, counters.get(dims, {}), histograms.get(dims, {}), units))
+        for doc in docs:
+            self._write(doc, units)
+        return docs
+
+    def flush_if_due(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _documents(
+        self,
+        dims: Dimensions,
+        counters: Dict[str, float],
+        histograms: Dict[str, Dict[float, int]],
+        units: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        # Histograms with more than 100 distinct values spill into extra documents.
+        chunks: List[Dict[str, Any]] = [dict(counters)]
+        for name, samples in histograms.items():
+            items = sorted(samples.items())
+            for i in range(0, len(items), _EMF_MAX_VALUES):
+                part = items[i:i + _EMF_MAX_VALUES]
+                index = i // _EMF_MAX_VALUES
+                if index == len(chunks):
+                    chunks.append({})
+                chunks[index][name] = {"Values": [v for v, _ in part], "Counts": [c for _, c in part]}
+
+        dimension_values = {"Service": self.service, **dict(dims)}
+        docs = []
+        for values in chunks:
+            if not values:
+                continue
+            docs.append(
+                {
+                    "_aws": {
+                        "Timestamp": int(time.time() * 1000),
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": self.namespace,
+                                "Dimensions": [list(dimension_values)],
+                                "Metrics": [{"Name": n, "Unit": units.get(n, "None")} for n in values],
+                            }
+                        ],
+                    },
+                    **dimension_values,
+                    **values,
+                }
+            )
+        return docs
+
+    def _write(self, doc: Dict[str, Any], units: Dict[str, str]) -> None:
+        if self.sink == SINK_EMF:
+            print(json.dumps(doc, separators=(",", ":")), flush=True)
+            return
+        if self.sink != SINK_STDOUT:
+            return
+        metric_names = [m["Name"] for m in doc["_aws"]["CloudWatchMetrics"][0]["Metrics"]]
+        dims = " ".join(f"{k}={doc[k]}" for k in doc["_aws"]["CloudWatchMetrics"][0]["Dimensions"][0])
+        for name in metric_names:
+            value = doc[name]
+            if isinstance(value, dict):
+                samples = [v for v, c in zip(value["Values"], value["Counts"]) for _ in range(c)]
+                summary = (
+                    f"n={len(samples)} p50={samples[len(samples) // 2]} "
+                    f"p99={samples[min(len(samples) - 1, int(len(samples) * 0.99))]} max={samples[-1]}"
+                )
+            else:
+                summary = f"{value:g}"
+            print(f"[metrics] {dims} {name} {summary} {units.get(name, '')}".rstrip(), flush=True)
+
+    def _ensure_flusher(self) -> None:
+        if self.flush_interval <= 0 or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to flush metrics")
+
+
+def _process_metrics() -> Metrics:
+    """
+    One registry per process. Should this module also be loaded under its
+    other name (``common.metrics`` next to ``src.common.metrics``), the copy
+    reuses the first instance: on Lambda only the instance flushed by
+    :func:`init_metrics` / the fast path is ever emitted.
+    """
+    for name in ("src.common.metrics", "common.metrics"):
+        module = sys.modules.get(name)
+        if name != __name__ and getattr(module, "metrics", None) is not None:
+            return module.metrics
+    return Metrics.from_env()
+
+
+metrics = _process_metrics()
+
+
+def init_metrics(app) -> None:
+    """Flush metrics at the end of every Flask request when due (always on Lambda)."""
+
+    @app.teardown_request
+    def _flush_metrics(exc):
+        metrics.flush_if_due()
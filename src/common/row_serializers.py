@@ -0,0 +1,147 @@
+"""Row serializers compiled once per table shape.
+
+Flask's JSON provider (and ``json_default``) dispatches on the type of every
+UUID, datetime and Decimal value at encode time. A :class:`RowSerializer`
+instead looks at the reflected column types once and generates a function
+that converts a row straight into JSON-native values::
+
+    def to_dict(row):
+        return {"id": _c0(row[0]), "numero": row[1], "created_at": _c3(row[3])}
+
+Columns that are already JSON-native (integers, strings, booleans, floats,
+JSON) are copied as-is. Serializers are cached by table shape (column names
+and types), so every tenant schema sharing a table layout reuses one.
+
+Conversions (``None`` stays ``None``): UUID -> str, date/time ->
+ISO-8601, Decimal -> str, bytes -> hex.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import enum
+import threading
+import uuid
+
+import sqlalchemy as sa
+
+from .ttl_cache import TTLCache
+
+
+def _str(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _isoformat(value: Any) -> Optional[str]:
+    return None if value is None else value.isoformat()
+
+
+def _hex(value: Any) -> Optional[str]:
+    return None if value is None else bytes(value).hex()
+
+
+def _to_json_value(value: Any) -> Any:
+    """Fallback for columns whose Python type is unknown: dispatch per value."""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+_NATIVE = (int, float, bool, str, dict, list)
+
+
+def _converter(column_type: sa.types.TypeEngine) -> Optional[Callable[[Any], Any]]:
+    """Converter for one column type, or None when values are already JSON-native."""
+    if isinstance(column_type, sa.Uuid) and not column_type.as_uuid:
+        return None
+    if isinstance(column_type, sa.Numeric) and not column_type.asdecimal:
+        return None
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return _to_json_value
+    if python_type in (datetime, date, dt_time):
+        return _isoformat
+    if python_type in (uuid.UUID, Decimal):
+        return _str
+    if python_type is bytes:
+        return _hex
+    if issubclass(python_type, _NATIVE):
+        return None
+    return _to_json_value
+
+
+def _compile(name: str, arg: str, result: str, env: Dict[str, Any]) -> Callable:
+    """exec ``def name(arg): return result``; keys are repr()-quoted, never raw names."""
+    namespace: Dict[str, Any] = {}
+    exec(f"def {name}({arg}):\n    return {result}\n", dict(env), namespace)  # noqa: S102
+    return namespace[name]
+
+
+def _dict_literal(entries: Sequence[Tuple[str, str]]) -> str:
+    return "{" + ", ".join(f"{key!r}: {expr}" for key, expr in entries) + "}"
+
+
+class RowSerializer:
+    def __init__(self, columns: Sequence[str], types: Sequence[sa.types.TypeEngine]):
+        self.columns = list(columns)
+        converters = [_converter(t) for t in types]
+        env = {f"_c{i}": conv for i, conv in enumerate(converters) if conv is not None}
+
+        dict_entries = []
+        list_exprs = []
+        for i, (key, conv) in enumerate(zip(self.columns, converters)):
+            expr = f"row[{i}]" if conv is None else f"_c{i}(row[{i}])"
+            dict_entries.append((key, expr))
+            list_exprs.append(expr)
+
+        self.to_dict: Callable[[Sequence[Any]], Dict[str, Any]] = _compile(
+            "to_dict", "row", _dict_literal(dict_entries), env
+        )
+        self.to_list: Callable[[Sequence[Any]], List[Any]] = _compile(
+            "to_list", "row", "[" + ", ".join(list_exprs) + "]", env
+        )
+
+    def many(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        to_dict = self.to_dict
+        return [to_dict(r) for r in rows]
+
+
+_SERIALIZERS = TTLCache(maxsize=256, ttl=float("inf"))
+_LOCK = threading.Lock()
+
+
+def _shape(columns: Iterable[sa.Column]) -> Tuple[Tuple[str, str], ...]:
+    return tuple((c.key, repr(c.type)) for c in columns)
+
+
+def row_serializer(table: sa.Table) -> RowSerializer:
+    """Serializer for rows selected as ``sa.select(table)`` (``table.c`` order)."""
+    shape = _shape(table.c)
+    serializer = _SERIALIZERS.get(shape)
+    if serializer is None:
+        with _LOCK:
+            serializer = _SERIALIZERS.get(shape)
+            if serializer is None:
+                serializer = RowSerializer([c.key for c in table.c], [c.type for c in table.c])
+                _SERIALIZERS.set(shape, serializer)
+    return serializer
+
+
+def attribute_serializer(
+    fields: Sequence[str], convert: Callable[[Any], Any] = _to_json_value
+) -> Callable[[Any], Dict[str, Any]]:
+    """Compiled ``obj -> {field: convert(obj.field)}`` for response models."""
+    for f in fields:
+        if not f.isidentifier():
+            raise ValueError(f"invalid attribute name: {f!r}")
+    entries = [(f, f"_convert(obj.{f})") for f in fields]
+    return _compile("serialize", "obj", _dict_literal(entries), {"_convert": convert})
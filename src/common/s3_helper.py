@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
 import os
-import boto3
 
 
 def get_bucket_name() -> str:
@@ -11,7 +11,11 @@ def get_bucket_name() -> str:
     return name
 
 
+@lru_cache(maxsize=None)
 def s3_client():
+    """S3 client, created (and boto3 imported) on first use, then reused."""
+    import boto3  # noqa: WPS433 (runtime import)
+
     return boto3.client("s3")
 
 
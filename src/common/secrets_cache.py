@@ -0,0 +1,163 @@
+"""Process-wide Secrets Manager cache with TTL and stale-while-revalidate.
+
+- fresh (younger than SECRETS_CACHE_TTL, default 300s): served from memory
+- stale (up to SECRETS_CACHE_MAX_STALE, default 3600s): served from memory
+  while one background thread fetches the new version
+- older, or never fetched: fetched synchronously; concurrent callers wait for
+  the same fetch instead of each calling Secrets Manager
+
+:meth:`SecretsCache.refresh` forces a fetch (used after a database
+authentication failure, i.e. a rotated password), rate-limited to one per
+SECRETS_REFRESH_MIN_INTERVAL seconds (default 10) per secret.
+
+The default client reads from SECRETS_REGION (default ``us-east-1``, where
+the secrets are kept). The client is anything with ``get_secret_value(SecretId=...)``; pass a stub
+to test without AWS.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional
+import base64
+import json
+import logging
+import os
+import threading
+import time
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "refreshing", "lock")
+
+    def __init__(self):
+        self.value: Any = None
+        self.fetched_at: Optional[float] = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+
+class SecretsCache:
+    def __init__(
+        self,
+        client: Any = None,
+        ttl: float = 300.0,
+        max_stale: float = 3600.0,
+        min_refresh_interval: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._client = client
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.min_refresh_interval = min_refresh_interval
+        self._clock = clock
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._log = logging.getLogger(__name__)
+        self.hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls, client: Any = None) -> "SecretsCache":
+        return cls(
+            client=client,
+            ttl=float(os.getenv("SECRETS_CACHE_TTL", "300")),
+            max_stale=float(os.getenv("SECRETS_CACHE_MAX_STALE", "3600")),
+            min_refresh_interval=float(os.getenv("SECRETS_REFRESH_MIN_INTERVAL", "10")),
+        )
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            import boto3
+
+            # The secrets live in us-east-1 whatever region the function runs in.
+            region = os.getenv("SECRETS_REGION", "us-east-1")
+            self._client = boto3.client("secretsmanager", region_name=region)
+        return self._client
+
+    def _entry(self, secret_id: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(secret_id)
+            if entry is None:
+                entry = self._entries[secret_id] = _Entry()
+            return entry
+
+    def get(self, secret_id: str) -> Any:
+        """Return the parsed secret (JSON value, or bytes for binary secrets)."""
+        entry = self._entry(secret_id)
+        now = self._clock()
+        fetched_at = entry.fetched_at
+        if fetched_at is not None:
+            age = now - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry.value
+            if age < self.ttl + self.max_stale:
+                self.stale_hits += 1
+                self._revalidate(secret_id, entry)
+                return entry.value
+
+        with entry.lock:
+            # Another caller may have fetched it while we waited.
+            if entry.fetched_at is not None and self._clock() - entry.fetched_at < self.ttl:
+                self.hits += 1
+                return entry.value
+            return self._fetch(secret_id, entry)
+
+    def refresh(self, secret_id: str) -> Any:
+        """Fetch now (e.g. after an auth failure), unless fetched very recently."""
+        entry = self._entry(secret_id)
+        with entry.lock:
+            if entry.fetched_at is not None and self._clock() - entry.fetched_at < self.min_refresh_interval:
+                return entry.value
+            return self._fetch(secret_id, entry)
+
+    def invalidate(self, secret_id: Optional[str] = None) -> None:
+        with self._lock:
+            if secret_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(secret_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "fetches": self.fetches, "errors": self.errors}
+
+    def _fetch(self, secret_id: str, entry: _Entry) -> Any:
+        try:
+            resp = self.client.get_secret_value(SecretId=secret_id)
+        except Exception:
+            self.errors += 1
+            raise
+        self.fetches += 1
+        entry.value = self._parse(resp)
+        entry.fetched_at = self._clock()
+        return entry.value
+
+    @staticmethod
+    def _parse(resp: Dict[str, Any]) -> Any:
+        if "SecretString" in resp:
+            return json.loads(resp["SecretString"])
+        return base64.b64decode(resp["SecretBinary"])
+
+    def _revalidate(self, secret_id: str, entry: _Entry) -> None:
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        def _run():
+            try:
+                with entry.lock:
+                    self._fetch(secret_id, entry)
+            except Exception:
+                # Keep serving the stale value; the next get() retries.
+                self._log.exception("Background secret refresh failed", extra={"secret_id": secret_id})
+            finally:
+                entry.refreshing = False
+
+        threading.Thread(target=_run, name="secret-refresh", daemon=True).start()
+
+
+secrets_cache = SecretsCache.from_env()
@@ -1,43 +1,34 @@
 #Libs
-from botocore.exceptions import ClientError
-import boto3
-import base64
-import json
+from .secrets_cache import secrets_cache
 
+# Errors that are re-raised to the caller; any other ClientError returns None.
+_RAISED_ERROR_CODES = {
+    # Secrets Manager can't decrypt the protected secret text using the provided KMS key.
+    'DecryptionFailureException',
+    # An error occurred on the server side.
+    'InternalServiceErrorException',
+    # You provided an invalid value for a parameter.
+    'InvalidParameterException',
+    # You provided a parameter value that is not valid for the current state of the resource.
+    'InvalidRequestException',
+    # We can't find the resource that you asked for.
+    'ResourceNotFoundException',
+}
 
-client = boto3.client('secretsmanager', region_name='us-east-1')
 
 def get_secret(secret_name):
+    """
+    Return the secret as parsed JSON (SecretString) or decoded bytes (SecretBinary).
+
+    Served from the shared TTL cache (``common.secrets_cache``), so warm
+    invocations do not call Secrets Manager.
+    """
+    # botocore is imported with the client, on the first fetch.
+    from botocore.exceptions import ClientError  # noqa: WPS433 (runtime import)
+
     try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
+        return secrets_cache.get(secret_name)
     except ClientError as e:
-        if e.response['Error']['Code'] == 'DecryptionFailureException':
-            # Secrets Manager can't decrypt the protected secret text using the provided KMS key.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InternalServiceErrorException':
-            # An error occurred on the server side.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InvalidParameterException':
-            # You provided an invalid value for a parameter.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'InvalidRequestException':
-            # You provided a parameter value that is not valid for the current state of the resource.
-            # Deal with the exception here, and/or rethrow at your discretion.
-            raise e
-        elif e.response['Error']['Code'] == 'ResourceNotFoundException':
-            # We can't find the resource that you asked for.
-            # Deal with the exception here, and/or rethrow at your discretion.
+        if e.response['Error']['Code'] in _RAISED_ERROR_CODES:
             raise e
-    else:
-        # Decrypts secret using the associated KMS CMK.
-        # Depending on whether the secret is a string or binary, one of these fields will be populated.
-        if 'SecretString' in get_secret_value_response:
-            secret = get_secret_value_response['SecretString']
-            return json.loads(secret)
-        else:
-            decoded_binary_secret = base64.b64decode(get_secret_value_response['SecretBinary'])
+        return None
@@ -0,0 +1,257 @@
+"""Opt-in SQL statement profiler (SQL_PROFILER=true).
+
+Hooks ``before/after_cursor_execute`` on the engines created by
+``conexao_banco`` and records:
+
+- per-statement timing, aggregated process-wide by normalized SQL
+  (IN-lists collapsed, whitespace squeezed) for the debug endpoint
+- per-request query counts, logged as one ``SQL profile`` line per request;
+  a statement repeated SQL_N_PLUS_ONE_THRESHOLD times (default 5) in one
+  request is logged as a likely N+1 (e.g. a lazy-loaded relationship)
+- a slow-query log: statements over SQL_SLOW_MS (default 200) are kept in a
+  ring buffer together with their plan. Only SELECTs are explained, since
+  ``EXPLAIN ANALYZE`` executes the statement; each statement is explained at
+  most once per SQL_EXPLAIN_INTERVAL seconds (default 60). The EXPLAIN runs
+  on the request's connection inside a savepoint, so a failed one does not
+  abort the request's transaction; it does add the statement's time again to
+  that request.
+
+The async (ECS) engines are profiled through their ``sync_engine``; ASGI
+routes call :func:`start_request` / :func:`log_request_summary` themselves.
+
+PostgreSQL plans use ``EXPLAIN (ANALYZE, BUFFERS)``; SQLite (local) uses
+``EXPLAIN QUERY PLAN``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import re
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+_PARAM_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\?|\$\d+|:\w+)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_REQUEST: ContextVar[Optional[Dict[str, Any]]] = ContextVar("sql_profile", default=None)
+
+_log = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return os.getenv("SQL_PROFILER", "false").strip().lower() in {"1", "true", "yes"}
+
+
+def normalize(statement: str) -> str:
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class SqlProfiler:
+    def __init__(
+        self,
+        slow_ms: float = 200.0,
+        n_plus_one_threshold: int = 5,
+        explain_interval: float = 60.0,
+        max_statements: int = 200,
+        max_slow: int = 50,
+    ):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.explain_interval = explain_interval
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._statements: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._slow: deque = deque(maxlen=max_slow)
+        self._explained_at: Dict[str, float] = {}
+        self._engines: "set[int]" = set()
+
+    @classmethod
+    def from_env(cls) -> "SqlProfiler":
+        return cls(
+            slow_ms=float(os.getenv("SQL_SLOW_MS", "200")),
+            n_plus_one_threshold=int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5")),
+            explain_interval=float(os.getenv("SQL_EXPLAIN_INTERVAL", "60")),
+        )
+
+    def attach(self, engine: sa.Engine) -> None:
+        if id(engine) in self._engines:
+            return
+        self._engines.add(id(engine))
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    # -- events ------------------------------------------------------------
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_profiler_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("sql_profiler_started")
+        if not stack:
+            return
+        elapsed_ms = (time.perf_counter() - stack.pop()) * 1000
+        sql = normalize(statement)
+
+        with self._lock:
+            stats = self._statements.pop(sql, None) or {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            self._statements[sql] = stats
+            while len(self._statements) > self.max_statements:
+                self._statements.popitem(last=False)
+
+        request = _REQUEST.get()
+        if request is not None:
+            request["queries"] += 1
+            request["total_ms"] += elapsed_ms
+            per_statement = request["statements"].setdefault(sql, {"count": 0, "total_ms": 0.0})
+            per_statement["count"] += 1
+            per_statement["total_ms"] += elapsed_ms
+
+        if elapsed_ms >= self.slow_ms:
+            self._record_slow(conn, statement, sql, parameters, executemany, elapsed_ms)
+
+    def _record_slow(self, conn, statement, sql, parameters, executemany, elapsed_ms) -> None:
+        plan = None
+        if not executemany and sql[:6].upper() == "SELECT" and self._should_explain(sql):
+            plan = self._explain(conn, statement, parameters)
+        entry = {"sql": sql, "ms": round(elapsed_ms, 2), "at": time.time(), "plan": plan}
+        with self._lock:
+            self._slow.append(entry)
+        _log.warning("Slow SQL", extra={"sql": sql[:500], "elapsed_ms": entry["ms"], "plan": plan})
+
+    def _should_explain(self, sql: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(sql)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained_at[sql] = now
+            if len(self._explained_at) > self.max_statements:
+                self._explained_at.pop(next(iter(self._explained_at)))
+            return True
+
+    @staticmethod
+    def _explain(conn, statement, parameters) -> Optional[List[str]]:
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+        elif dialect == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            return None
+        dbapi_conn = conn.connection.dbapi_connection
+        # A failed EXPLAIN (timeout, bad parameters) would leave the request's
+        # PostgreSQL transaction aborted: run it inside a savepoint that is
+        # always rolled back. Not needed (nor allowed) in autocommit.
+        savepoint = dialect == "postgresql" and not getattr(dbapi_conn, "autocommit", False)
+        # Raw DBAPI cursor: bypasses the engine events (no recursion, not counted).
+        cursor = dbapi_conn.cursor()
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT sql_profiler_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return [" ".join(str(v) for v in row) for row in cursor.fetchall()]
+            finally:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT sql_profiler_explain")
+                    cursor.execute("RELEASE SAVEPOINT sql_profiler_explain")
+        except Exception:
+            _log.exception("EXPLAIN failed", extra={"sql": normalize(statement)[:500]})
+            return None
+        finally:
+            cursor.close()
+
+    # -- reporting ---------------------------------------------------------
+
+    def snapshot(self, top: int = 20) -> Dict[str, Any]:
+        """Process-wide view for the debug endpoint."""
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+            slow = list(self._slow)
+        return {
+            "slow_ms": self.slow_ms,
+            "statements": [
+                {
+                    "sql": sql,
+                    "count": s["count"],
+                    "total_ms": round(s["total_ms"], 2),
+                    "avg_ms": round(s["total_ms"] / s["count"], 2),
+                    "max_ms": round(s["max_ms"], 2),
+                }
+                for sql, s in statements[:top]
+            ],
+            "slow": slow,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self._explained_at.clear()
+
+
+profiler = SqlProfiler.from_env()
+
+
+def start_request() -> None:
+    _REQUEST.set({"queries": 0, "total_ms": 0.0, "statements": {}})
+
+
+def request_summary(top: int = 5) -> Optional[Dict[str, Any]]:
+    """Query count/time of the current request, its top statements and N+1 suspects."""
+    request = _REQUEST.get()
+    if request is None:
+        return None
+    statements = sorted(request["statements"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+    return {
+        "queries": request["queries"],
+        "total_ms": round(request["total_ms"], 2),
+        "top": [
+            {"sql": sql[:200], "count": s["count"], "total_ms": round(s["total_ms"], 2)}
+            for sql, s in statements[:top]
+        ],
+        "n_plus_one": [
+            {"sql": sql[:200], "count": s["count"]}
+            for sql, s in statements
+            if s["count"] >= profiler.n_plus_one_threshold
+        ],
+    }
+
+
+def log_request_summary(path: str, status: int) -> None:
+    """Log the current request's profile (warning when it has N+1 suspects)."""
+    summary = request_summary()
+    if summary is None:
+        return
+    extra = {"path": path, "status": status, "sql_profile": summary}
+    if summary["n_plus_one"]:
+        _log.warning("SQL profile: possible N+1", extra=extra)
+    else:
+        _log.info("SQL profile", extra=extra)
+
+
+def init_sql_profiler(app) -> None:
+    """Profile every Flask request and log its summary (no-op unless SQL_PROFILER is on)."""
+    if not enabled():
+        return
+
+    @app.before_request
+    def _start_sql_profile():
+        start_request()
+
+    @app.after_request
+    def _log_sql_profile(response):
+        from flask import request  # noqa: WPS433 (runtime import)
+
+        log_request_summary(request.path, response.status_code)
+        return response
@@ -0,0 +1,162 @@
+"""Content negotiation and encoders for list responses.
+
+Formats (``?format=`` wins over the ``Accept`` header):
+
+- ``json`` (default, ``application/json``): one object per row (``items``)
+- ``columnar`` (``application/vnd.columnar+json``): column names once and
+  ``rows`` as value arrays
+- ``csv`` (``text/csv``): header + rows; page metadata in response headers
+- ``arrow`` (``application/vnd.apache.arrow.stream``) and ``parquet``
+  (``application/vnd.apache.parquet``): need the optional ``pyarrow`` package;
+  page metadata in response headers and in the schema metadata
+
+Encoders take the column names and value tuples of a page listed with
+``as_rows=True``, so no per-row dict is built.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import importlib.util
+import io
+import json
+
+from .export_formats import encode_csv, json_default
+
+# Optional: only needed for arrow / parquet. Imported on first use (~65 ms of
+# cold start otherwise), so only its presence is checked here.
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_CSV = "csv"
+FORMAT_ARROW = "arrow"
+FORMAT_PARQUET = "parquet"
+
+MIMETYPES = {
+    FORMAT_JSON: "application/json",
+    FORMAT_COLUMNAR: "application/vnd.columnar+json",
+    FORMAT_CSV: "text/csv",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+_BY_MIMETYPE = {v: k for k, v in MIMETYPES.items()}
+_BINARY_FORMATS = (FORMAT_ARROW, FORMAT_PARQUET)
+
+_JSON = json.JSONEncoder(default=json_default, separators=(",", ":"), ensure_ascii=False)
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+def available_formats() -> List[str]:
+    if not _HAS_PYARROW:
+        return [f for f in MIMETYPES if f not in _BINARY_FORMATS]
+    return list(MIMETYPES)
+
+
+def negotiate(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """Pick the response format from ``?format=`` or the ``Accept`` header."""
+    if requested:
+        if requested not in MIMETYPES:
+            raise UnsupportedFormatError(f"format must be one of: {', '.join(available_formats())}")
+        if requested not in available_formats():
+            raise UnsupportedFormatError(f"format {requested} needs pyarrow, which is not installed")
+        return requested
+
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        mimetype, q = fields[0].lower(), 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, position, mimetype))
+    for _, _, mimetype in sorted(candidates):
+        fmt = _BY_MIMETYPE.get(mimetype)
+        if fmt in available_formats():
+            return fmt
+        if mimetype in ("*/*", "application/*"):
+            return FORMAT_JSON
+    return FORMAT_JSON
+
+
+def _headers(meta: Dict[str, Any]) -> Dict[str, str]:
+    """Page metadata for formats that have no envelope."""
+    headers = {"X-Count": str(meta.get("count", "")), "X-Has-More": str(bool(meta.get("has_more"))).lower()}
+    if meta.get("total") is not None:
+        headers["X-Total-Count"] = str(meta["total"])
+    if meta.get("next_cursor"):
+        headers["X-Next-Cursor"] = meta["next_cursor"]
+    if meta.get("next_offset") is not None:
+        headers["X-Next-Offset"] = str(meta["next_offset"])
+    return headers
+
+
+def encode_columnar(
+    meta: Dict[str, Any], columns: Sequence[str], rows: Sequence[Sequence[Any]]
+) -> Tuple[bytes, Dict[str, str]]:
+    body = {**meta, "columns": list(columns), "rows": [list(r) for r in rows]}
+    return _JSON.encode(body).encode("utf-8"), {}
+
+
+def encode_csv_page(
+    meta: Dict[str, Any], columns: Sequence[str], rows: Sequence[Sequence[Any]]
+) -> Tuple[bytes, Dict[str, str]]:
+    return encode_csv(columns, rows, True).encode("utf-8"), _headers(meta)
+
+
+def _arrow_array(values: Sequence[Any]):
+    import pyarrow as pa  # noqa: WPS433 (runtime import)
+
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # e.g. uuid.UUID: ship as text rather than fail the response.
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _arrow_table(meta: Dict[str, Any], columns: Sequence[str], rows: Sequence[Sequence[Any]]):
+    import pyarrow as pa  # noqa: WPS433 (runtime import)
+
+    arrays = list(zip(*rows)) if rows else [() for _ in columns]
+    table = pa.table({name: _arrow_array(values) for name, values in zip(columns, arrays)})
+    metadata = {k: _JSON.encode(v) for k, v in meta.items()}
+    return table.replace_schema_metadata(metadata)
+
+
+def encode_arrow(
+    meta: Dict[str, Any], columns: Sequence[str], rows: Sequence[Sequence[Any]]
+) -> Tuple[bytes, Dict[str, str]]:
+    import pyarrow as pa  # noqa: WPS433 (runtime import)
+    import pyarrow.ipc as pa_ipc  # noqa: WPS433 (runtime import)
+
+    table = _arrow_table(meta, columns, rows)
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes(), _headers(meta)
+
+
+def encode_parquet(
+    meta: Dict[str, Any], columns: Sequence[str], rows: Sequence[Sequence[Any]]
+) -> Tuple[bytes, Dict[str, str]]:
+    import pyarrow.parquet as pa_parquet  # noqa: WPS433 (runtime import)
+
+    out = io.BytesIO()
+    pa_parquet.write_table(_arrow_table(meta, columns, rows), out, compression="zstd")
+    return out.getvalue(), _headers(meta)
+
+
+# format -> (meta, columns, rows) -> (body, extra headers); json stays with jsonify.
+ENCODERS: Dict[str, Callable[..., Tuple[bytes, Dict[str, str]]]] = {
+    FORMAT_COLUMNAR: encode_columnar,
+    FORMAT_CSV: encode_csv_page,
+    FORMAT_ARROW: encode_arrow,
+    FORMAT_PARQUET: encode_parquet,
+}
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+"""asyncio variant of :class:`GenericCrudRepository`.
+
+The sync repository is reused as-is: it is bound to the ``sync_engine`` facade
+of the AsyncEngine and each call runs under ``greenlet_spawn`` (the same
+mechanism ``AsyncSession`` uses), so statements go through the asyncio driver
+without blocking the event loop. Tenant selection, reader/writer routing,
+keyset pagination, total strategies and bulk operations therefore behave
+exactly like the sync path.
+
+The query-result cache is not wired in here: its single-flight waits block the
+calling thread, which on the event loop would stall every other request.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import greenlet_spawn
+
+from ..common.conexao_banco import reads_from_writer
+from .generic_crud_repository import BulkResult, GenericCrudRepository, Page
+from .reflection_cache import ReflectionCache
+
+
+class AsyncGenericCrudRepository:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        reflection_cache: Optional[ReflectionCache] = None,
+        reader_engine: Optional[AsyncEngine] = None,
+    ):
+        self.engine = engine
+        self.reader_engine = reader_engine or engine
+        self.sync = GenericCrudRepository(
+            engine.sync_engine,
+            reflection_cache=reflection_cache,
+            reader_engine=self.reader_engine.sync_engine,
+        )
+
+    async def get_table(self, table_name: str, schema: str) -> sa.Table:
+        return await greenlet_spawn(self.sync.get_table, table_name, schema)
+
+    keyset_columns = staticmethod(GenericCrudRepository.keyset_columns)
+    keyset_order_by = staticmethod(GenericCrudRepository.keyset_order_by)
+
+    async def list(self, table: sa.Table, **kwargs: Any) -> Page:
+        """See :meth:`GenericCrudRepository.list`."""
+        return await greenlet_spawn(self.sync.list, table, **kwargs)
+
+    async def table_version(self, table: sa.Table, *, schema: Optional[str] = None) -> Optional[str]:
+        """See :meth:`GenericCrudRepository.table_version`."""
+        return await greenlet_spawn(self.sync.table_version, table, schema=schema)
+
+    async def list_versioned(
+        self,
+        table: sa.Table,
+        *,
+        schema: Optional[str] = None,
+        unchanged: Callable[[str], bool] = lambda version: False,
+        **kwargs: Any,
+    ) -> Tuple[Optional[str], Optional[Page]]:
+        """See :meth:`GenericCrudRepository.list_versioned` (one greenlet, so one pinned connection)."""
+        return await greenlet_spawn(self.sync.list_versioned, table, schema=schema, unchanged=unchanged, **kwargs)
+
+    async def get_by_id(self, table: sa.Table, id_value: Any, *, schema: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await greenlet_spawn(self.sync.get_by_id, table, id_value, schema=schema)
+
+    async def get_many(self, table: sa.Table, ids: Iterable[Any], **kwargs: Any) -> List[Optional[Dict[str, Any]]]:
+        return await greenlet_spawn(self.sync.get_many, table, ids, **kwargs)
+
+    async def iter_rows(
+        self,
+        table: sa.Table,
+        *,
+        schema: Optional[str] = None,
+        filters: Optional[Iterable[sa.ColumnElement[bool]]] = None,
+        order_by: Optional[List[sa.ClauseElement]] = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[sa.Row]:
+        """Stream rows with a server-side cursor (see :meth:`GenericCrudRepository.iter_rows`)."""
+        stmt = GenericCrudRepository.select_stmt(table, filters=filters, order_by=order_by)
+        engine = self.engine if reads_from_writer() else self.reader_engine
+        async with engine.connect() as conn:
+            if schema:
+                await conn.execution_options(schema_translate_map={None: schema})
+            result = await conn.stream(stmt.execution_options(yield_per=chunk_size))
+            async for row in result:
+                yield row
+
+    async def create(self, table: sa.Table, data: Dict[str, Any], *, schema: Optional[str] = None) -> Dict[str, Any]:
+        return await greenlet_spawn(self.sync.create, table, data, schema=schema)
+
+    async def update(
+        self, table: sa.Table, id_value: Any, data: Dict[str, Any], *, schema: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await greenlet_spawn(self.sync.update, table, id_value, data, schema=schema)
+
+    async def delete(self, table: sa.Table, id_value: Any, *, schema: Optional[str] = None) -> bool:
+        return await greenlet_spawn(self.sync.delete, table, id_value, schema=schema)
+
+    async def create_many(self, table: sa.Table, rows: Iterable[Dict[str, Any]], **kwargs: Any) -> BulkResult:
+        return await greenlet_spawn(self.sync.create_many, table, list(rows), **kwargs)
+
+    async def upsert_many(self, table: sa.Table, rows: Iterable[Dict[str, Any]], **kwargs: Any) -> BulkResult:
+        return await greenlet_spawn(self.sync.upsert_many, table, list(rows), **kwargs)
+
+    async def update_many(self, table: sa.Table, rows: Iterable[Dict[str, Any]], **kwargs: Any) -> BulkResult:
+        return await greenlet_spawn(self.sync.update_many, table, list(rows), **kwargs)
+
+    async def delete_many(self, table: sa.Table, ids: Iterable[Any], **kwargs: Any) -> BulkResult:
+        return await greenlet_spawn(self.sync.delete_many, table, list(ids), **kwargs)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.sync.cache_stats()
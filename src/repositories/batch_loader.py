@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+"""Request-scoped batching of primary-key lookups (DataLoader pattern).
+
+Code that needs several rows by id calls :meth:`BatchLoader.load`, which only
+queues the id and returns a :class:`Deferred`. The first time any deferred
+value is read, every queued id is resolved with a single
+``GenericCrudRepository.get_many`` query; results are memoized for the rest
+of the request. Fan-out lookups therefore cost one round trip instead of N.
+
+Create one loader per request (see ``NotaServicoService.loader``): results are
+not invalidated by writes.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+import sqlalchemy as sa
+
+from .generic_crud_repository import _key_normalizer, _pk_column
+
+if TYPE_CHECKING:
+    from .generic_crud_repository import GenericCrudRepository
+
+
+class Deferred:
+    def __init__(self, loader: "BatchLoader", key: Any):
+        self._loader = loader
+        self._key = key
+
+    @property
+    def value(self) -> Optional[Dict[str, Any]]:
+        return self._loader._resolve(self._key)
+
+
+class BatchLoader:
+    def __init__(
+        self,
+        repo: "GenericCrudRepository",
+        table: sa.Table,
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = 1000,
+    ):
+        self.repo = repo
+        self.table = table
+        self.schema = schema
+        self.batch_size = batch_size
+        self._normalize = _key_normalizer(_pk_column(table))
+        self._pending: Dict[Any, None] = {}
+        self._results: Dict[Any, Optional[Dict[str, Any]]] = {}
+        self.queries = 0
+
+    def load(self, id_value: Any) -> Deferred:
+        key = self._normalize(id_value)
+        if key not in self._results:
+            self._pending[key] = None
+        return Deferred(self, key)
+
+    def load_many(self, ids: Iterable[Any]) -> List[Deferred]:
+        return [self.load(v) for v in ids]
+
+    def get(self, id_value: Any) -> Optional[Dict[str, Any]]:
+        """Load and resolve immediately (still batched with anything already queued)."""
+        return self.load(id_value).value
+
+    def dispatch(self) -> None:
+        """Resolve every queued id with one ``get_many`` call."""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        rows = self.repo.get_many(self.table, keys, schema=self.schema, batch_size=self.batch_size)
+        self.queries += 1
+        self._results.update(zip(keys, rows))
+
+    def _resolve(self, key: Any) -> Optional[Dict[str, Any]]:
+        if key not in self._results:
+            self._pending[key] = None
+            self.dispatch()
+        return self._results[key]
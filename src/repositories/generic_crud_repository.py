@@ -5,116 +5,997 @@ from __future__ import annotations
 Why Table-based?
 - You asked to keep the model as a reflected ``Table(...autoload_with=engine...)``.
 - We also want to support dynamic schemas (schema name comes from the API).
+  Tables are reflected once without a schema (see ``reflection_cache``) and every
+  method takes ``schema=`` to pick the tenant through ``schema_translate_map``.
+- Reads go to ``reader_engine`` (read replica) unless the current request has
+  already written; writes always go to ``engine``.
 
-This repository keeps things intentionally small: list, get, create, update, delete.
+This repository keeps things intentionally small: list, get, create, update, delete,
+plus batched ``*_many`` variants for bulk loads.
+
+Pagination
+- ``offset`` mode (default): classic ``LIMIT/OFFSET``.
+- ``keyset`` mode: seek on ``(created_at, id)`` with an opaque cursor, so page N
+  costs the same as page 1 on large tenant tables (one range scan of the
+  ``(created_at DESC, id DESC)`` index; NULL ``created_at`` rows come last).
+
+Byte budget (``max_bytes=``)
+- The page is cut once the estimated JSON size of its rows reaches the
+  budget; at least one row is always returned. Pages larger than
+  ``BUDGET_FETCH_ROWS`` are fetched incrementally (``yield_per``), smaller
+  ones in one buffered read. ``Page.truncated`` is then set and the page continues at
+  ``Page.next_cursor`` (keyset) or ``Page.next_offset`` (offset).
+
+Total count (``total=``)
+- ``exact``: separate ``SELECT count(*)`` (default).
+- ``window``: ``count(*) OVER ()`` inside the page query (one round trip);
+  keyset pages after the first fall back to the ``count(*)`` query, since the
+  window only sees the rows past the cursor.
+- ``estimate``: planner estimate (``pg_class.reltuples`` / ``EXPLAIN``).
+- ``none``: no count; use ``Page.has_more``.
+
+Change versions
+- ``table_version`` returns a watermark that changes whenever the table does:
+  on PostgreSQL a generation counter in ``public.table_versions``, bumped by a
+  statement trigger in the same transaction as the write (see the flyway
+  schemas). ``list_versioned`` reads it and the page on one connection, so a
+  page is never older than the version it is tagged with; the API derives
+  ETags from it.
+
+Results
+- Row dicts are built by a serializer compiled once per table shape
+  (``common.row_serializers``): UUID/Decimal come back as ``str`` and
+  date/time values as ISO-8601 strings, ready for ``jsonify``.
+- ``list(as_rows=True)`` keeps the raw driver values for the binary formats.
 """
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+import base64
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
+import uuid
+import weakref
 
 import sqlalchemy as sa
 from sqlalchemy.engine import Engine
 
+from ..common.conexao_banco import mark_written, reads_from_writer
+from ..common.row_serializers import row_serializer
+from ..common.ttl_cache import TTLCache
+from .query_cache import QueryCache
+from .reflection_cache import ReflectionCache
+
 
 @dataclass(frozen=True)
 class Page:
-    items: List[Dict[str, Any]]
+    # Dicts, or plain tuples in ``columns`` order when listed with ``as_rows=True``.
+    items: List[Any]
     total: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total_strategy: str = "exact"
+    columns: Optional[List[str]] = None
+    # Offset of the next page (offset mode, when ``has_more``).
+    next_offset: Optional[int] = None
+    # Cut short by ``max_bytes`` before reaching ``limit``.
+    truncated: bool = False
+
+
+TOTAL_EXACT = "exact"
+TOTAL_WINDOW = "window"
+TOTAL_ESTIMATE = "estimate"
+TOTAL_NONE = "none"
+TOTAL_STRATEGIES = (TOTAL_EXACT, TOTAL_WINDOW, TOTAL_ESTIMATE, TOTAL_NONE)
+
+RETURN_NONE = "none"
+RETURN_KEYS = "keys"
+RETURN_ROWS = "rows"
+RETURNING_MODES = (RETURN_NONE, RETURN_KEYS, RETURN_ROWS)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Rows per fetch of a byte-budgeted page (server-side cursor on PostgreSQL).
+BUDGET_FETCH_ROWS = 100
+
+# Generation counters kept by the flyway ``public.bump_table_version`` trigger.
+TABLE_VERSIONS = sa.table(
+    "table_versions",
+    sa.column("schema_name"),
+    sa.column("table_name"),
+    sa.column("version"),
+    schema="public",
+)
+
+# (engine, connection) that ``list_versioned`` pins for the reads it makes.
+_PINNED: "ContextVar[Optional[Tuple[Engine, sa.Connection]]]" = ContextVar("crud_pinned_connection", default=None)
+
+
+@dataclass(frozen=True)
+class BulkResult:
+    count: int
+    items: List[Any]
+
+
+_PK_COLUMNS: "weakref.WeakKeyDictionary[sa.Table, sa.Column]" = weakref.WeakKeyDictionary()
+
+
+def _pk_column(table: sa.Table) -> sa.Column:
+    """The single primary key column of ``table`` (resolved once per table)."""
+    col = _PK_COLUMNS.get(table)
+    if col is None:
+        pk = list(table.primary_key.columns)
+        if len(pk) != 1:
+            raise ValueError("Table must have exactly one primary key column")
+        col = _PK_COLUMNS[table] = pk[0]
+    return col
+
+
+def _key_normalizer(col: sa.Column):
+    """Coerce ids to the column's Python type so DB values and inputs compare equal."""
+    try:
+        python_type = col.type.python_type
+    except NotImplementedError:
+        return lambda v: v
+    if python_type is uuid.UUID:
+        return lambda v: v if isinstance(v, uuid.UUID) else uuid.UUID(str(v))
+    if python_type is int:
+        return int
+    return lambda v: v
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    """Split ``rows`` into batches of at most ``size`` rows sharing the same keys.
+
+    executemany needs every parameter set of a statement to bind the same
+    columns, so rows with different key sets go to different batches.
+    """
+    pending: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        key = tuple(sorted(row))
+        batch = pending.setdefault(key, [])
+        batch.append(row)
+        if len(batch) >= size:
+            yield pending.pop(key)
+    yield from pending.values()
+
+
+def _json_size(values: Iterable[Any]) -> int:
+    """Upper-bound estimate of the JSON size of ``values`` (escapes of ASCII text aside)."""
+    size = 0
+    for value in values:
+        if value is None:
+            size += 4
+        elif isinstance(value, str):
+            # Non-ASCII text may go out as \uXXXX escapes: 6 bytes per character.
+            size += (len(value) if value.isascii() else 6 * len(value)) + 2
+        elif isinstance(value, (bool, int, float)):
+            size += len(str(value))
+        else:
+            # UUID, date/time, Decimal: serialized as quoted strings of about str() length.
+            size += len(str(value)) + 2
+    return size
+
+
+def _rows_within(result: sa.CursorResult, limit: int, max_bytes: int, row_overhead: int, width: int):
+    """
+    ``(rows, truncated)``: rows of ``result`` (at most ``limit + 1``, the last one
+    only telling that more exist) until their JSON size would exceed ``max_bytes``.
+    """
+    rows: List[sa.Row] = []
+    size = 2  # []
+    try:
+        for row in result:
+            if len(rows) == limit:
+                rows.append(row)
+                break
+            size += _json_size(row[:width]) + row_overhead
+            if rows and size > max_bytes:
+                return rows, True
+            rows.append(row)
+    finally:
+        result.close()
+    return rows, False
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    # Tag non-JSON types so they round-trip with the right Python type.
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if "d" in value:
+        return date.fromisoformat(value["d"])
+    if "uuid" in value:
+        return uuid.UUID(value["uuid"])
+    if "dec" in value:
+        return Decimal(value["dec"])
+    raise InvalidCursorError("invalid cursor")
+
+
+def encode_cursor(values: Iterable[Any]) -> str:
+    """Encode the keyset values of the last row into an opaque cursor."""
+    payload = json.dumps([_encode_cursor_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list):
+            raise InvalidCursorError("invalid cursor")
+        return [_decode_cursor_value(v) for v in values]
+    except InvalidCursorError:
+        raise
+    except Exception as exc:
+        raise InvalidCursorError("invalid cursor") from exc
+
+
+def load_catalog(conn: sa.Connection) -> FrozenSet[Tuple[str, str]]:
+    """Every ``(schema, table)`` pair visible on ``conn``, in one catalog query on PostgreSQL."""
+    if conn.dialect.name == "postgresql":
+        stmt = sa.text(
+            "SELECT n.nspname, c.relname FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f') "
+            "AND n.nspname NOT LIKE 'pg\\_%' AND n.nspname <> 'information_schema'"
+        )
+        return frozenset((s, t) for s, t in conn.execute(stmt))
+    inspector = sa.inspect(conn)
+    return frozenset(
+        (s, t)
+        for s in inspector.get_schema_names()
+        for t in inspector.get_table_names(schema=s) + inspector.get_view_names(schema=s)
+    )
 
 
 class GenericCrudRepository:
-    def __init__(self, engine: Engine):
+    def __init__(
+        self,
+        engine: Engine,
+        reflection_cache: Optional[ReflectionCache] = None,
+        query_cache: Optional[QueryCache] = None,
+        reader_engine: Optional[Engine] = None,
+    ):
         self.engine = engine
-        self._table_cache: Dict[Tuple[str, str], sa.Table] = {}
+        self.reader_engine = reader_engine or engine
+        # Optional read-through cache for list/get_by_id; writes invalidate it.
+        self.query_cache = query_cache
+        self.reflection_cache = reflection_cache or ReflectionCache()
+        self.reflection_cache.load()
+        # (schema, table) pairs confirmed to exist -> shared table shape
+        self._table_cache = TTLCache(
+            maxsize=int(os.getenv("DB_TABLE_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("DB_TABLE_CACHE_TTL", "600")),
+        )
+        # (schema, table) pairs known NOT to exist, so unknown schemas that pass
+        # SCHEMA_REGEX never reach the catalog more than once per TTL.
+        self._missing_cache = TTLCache(
+            maxsize=int(os.getenv("DB_MISSING_TABLE_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("DB_MISSING_TABLE_CACHE_TTL", "60")),
+        )
+        self._catalog_ttl = float(os.getenv("DB_CATALOG_SNAPSHOT_TTL", "60"))
+        self._catalog: FrozenSet[Tuple[str, str]] = frozenset()
+        self._catalog_loaded_at: Optional[float] = None
+        self._catalog_refreshes = 0
+        self._catalog_lock = threading.Lock()
 
     def get_table(self, table_name: str, schema: str) -> sa.Table:
+        """Return the schema-less shape of ``table_name``, checking it exists in ``schema``.
+
+        The returned table is shared by all tenants: pass ``schema=`` to the
+        other repository methods to choose which one is queried. Raises
+        ``sqlalchemy.exc.NoSuchTableError`` for unknown schemas/tables.
+        """
         key = (schema, table_name)
-        if key in self._table_cache:
-            return self._table_cache[key]
+        table = self._table_cache.get(key)
+        if table is not None:
+            return table
+        if self._missing_cache.get(key):
+            raise sa.exc.NoSuchTableError(f"{schema}.{table_name}")
 
-        metadata = sa.MetaData()
         log = logging.getLogger(__name__)
         try:
-            table = sa.Table(table_name, metadata, schema=schema, autoload_with=self.engine)
+            if key not in self._catalog_snapshot():
+                self._missing_cache.set(key, True)
+                raise sa.exc.NoSuchTableError(f"{schema}.{table_name}")
+            table = self.reflection_cache.get(table_name)
+            if table is None:
+                reflected = sa.Table(table_name, sa.MetaData(), schema=schema, autoload_with=self.engine)
+                table = self.reflection_cache.add(reflected)
+                self.reflection_cache.save()
+        except sa.exc.NoSuchTableError:
+            log.warning("Table not found", extra={"schema": schema, "table_name": table_name})
+            raise
         except Exception:
             log.exception(
                 "Failed to reflect table",
                 extra={"schema": schema, "table_name": table_name},
             )
             raise
-        self._table_cache[key] = table
+        self._table_cache.set(key, table)
         return table
 
+    def _catalog_snapshot(self) -> FrozenSet[Tuple[str, str]]:
+        """All ``(schema, table)`` pairs in the database, refreshed every ``DB_CATALOG_SNAPSHOT_TTL`` s."""
+        with self._catalog_lock:
+            loaded_at = self._catalog_loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self._catalog_ttl:
+                return self._catalog
+
+        # Query outside the lock: the async repository runs this on the event
+        # loop thread, where blocking on a lock held across I/O would deadlock.
+        with self.engine.connect() as conn:
+            catalog = load_catalog(conn)
+
+        with self._catalog_lock:
+            self._catalog = catalog
+            self._catalog_loaded_at = time.monotonic()
+            self._catalog_refreshes += 1
+        return catalog
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters of the table caches."""
+        return {
+            "tables": self._table_cache.stats(),
+            "missing": self._missing_cache.stats(),
+            "catalog_refreshes": self._catalog_refreshes,
+            "catalog_size": len(self._catalog),
+        }
+
+    @staticmethod
+    def _translate(conn: sa.Connection, schema: Optional[str]) -> sa.Connection:
+        if schema:
+            conn.execution_options(schema_translate_map={None: schema})
+        return conn
+
+    @contextmanager
+    def _connect(self, schema: Optional[str]) -> Iterator[sa.Connection]:
+        """Read connection: reader, or writer once this request has written."""
+        engine = self.engine if reads_from_writer() else self.reader_engine
+        pinned = _PINNED.get()
+        if pinned is not None and pinned[0] is engine:
+            yield self._translate(pinned[1], schema)
+            return
+        with engine.connect() as conn:
+            yield self._translate(conn, schema)
+
+    @contextmanager
+    def _pinned(self, schema: Optional[str]) -> Iterator[None]:
+        """Serve every :meth:`_connect` inside the block from one connection."""
+        engine = self.engine if reads_from_writer() else self.reader_engine
+        with engine.connect() as conn:
+            token = _PINNED.set((engine, conn))
+            try:
+                yield
+            finally:
+                _PINNED.reset(token)
+
+    @contextmanager
+    def _begin(self, schema: Optional[str]) -> Iterator[sa.Connection]:
+        """Write transaction on the writer."""
+        mark_written()
+        with self.engine.begin() as conn:
+            yield self._translate(conn, schema)
+
+    def _cached(self, schema: Optional[str], table: sa.Table, stmt: sa.Executable, extra: Any, loader):
+        if self.query_cache is None:
+            return loader()
+        compiled = stmt.compile(dialect=self.engine.dialect)
+        parts = (str(compiled), sorted(compiled.params.items()), extra)
+        return self.query_cache.get_or_load((schema, table.name), parts, loader)
+
+    def _invalidate(self, schema: Optional[str], table: sa.Table) -> None:
+        if self.query_cache is not None:
+            self.query_cache.invalidate((schema, table.name))
+
+    @staticmethod
+    def keyset_columns(table: sa.Table) -> List[sa.Column]:
+        """Columns used for keyset pagination: ``created_at`` (if any) then the primary key."""
+        cols = [table.c.created_at] if "created_at" in table.c else []
+        return cols + [_pk_column(table)]
+
+    @staticmethod
+    def keyset_order_by(table: sa.Table) -> List[sa.ClauseElement]:
+        """Keyset order: :meth:`keyset_columns` descending, NULLs last.
+
+        Matches the ``(created_at DESC, id DESC)`` index of the flyway schemas.
+        """
+        cols = GenericCrudRepository.keyset_columns(table)
+        return [c.desc().nulls_last() if c.nullable else c.desc() for c in cols]
+
+    @staticmethod
+    def keyset_after(table: sa.Table, values: List[Any]) -> sa.ColumnElement[bool]:
+        """Rows after the cursor ``values`` in :meth:`keyset_order_by` order."""
+        cols = GenericCrudRepository.keyset_columns(table)
+        if len(values) != len(cols):
+            raise InvalidCursorError("invalid cursor")
+        if not any(c.nullable for c in cols):
+            # Row-value comparison: one range scan on the index.
+            return sa.tuple_(*cols) < sa.tuple_(*values)
+        # Nullable columns: a NULL never compares, so spell the order out
+        # (NULLs sort after every value).
+        clauses = []
+        equal: List[sa.ColumnElement[bool]] = []
+        for col, value in zip(cols, values):
+            if value is None:
+                after, same = sa.false(), col.is_(None)
+            else:
+                after = sa.or_(col < value, col.is_(None)) if col.nullable else col < value
+                same = col == value
+            clauses.append(sa.and_(*equal, after))
+            equal.append(same)
+        return sa.or_(*clauses)
+
     def list(
         self,
         table: sa.Table,
         *,
+        schema: Optional[str] = None,
         filters: Optional[Iterable[sa.ColumnElement[bool]]] = None,
         order_by: Optional[List[sa.ClauseElement]] = None,
         limit: int = 50,
         offset: int = 0,
+        keyset: bool = False,
+        cursor: Optional[str] = None,
+        total: str = TOTAL_EXACT,
+        as_rows: bool = False,
+        version: Optional[str] = None,
+        max_bytes: Optional[int] = None,
     ) -> Page:
+        """List rows of ``table``.
+
+        With ``keyset=True`` (or when a ``cursor`` is given) rows are ordered by
+        :meth:`keyset_columns` descending, ``offset``/``order_by`` are ignored and
+        ``Page.next_cursor`` is set when more rows exist.
+
+        ``total`` selects how ``Page.total`` is computed (see module docstring);
+        it is ``None`` with ``total="none"``.
+
+        With ``as_rows=True`` ``Page.items`` holds value tuples in
+        ``Page.columns`` order instead of one dict per row (columnar and
+        binary encoders consume them directly).
+
+        ``version`` is the :meth:`table_version` the caller tagged the response
+        with; it is part of the query cache key, so a page cached before a
+        change made elsewhere is never served under the newer version.
+
+        ``max_bytes`` caps the estimated JSON size of ``items`` (see module
+        docstring). Pages of more than ``BUDGET_FETCH_ROWS`` rows are then
+        fetched that many at a time, so at most one batch beyond the page is
+        held in memory; smaller pages are read in one buffered fetch.
+        """
+        if total not in TOTAL_STRATEGIES:
+            raise ValueError(f"invalid total strategy: {total}")
         filters = list(filters or [])
-        order_by = order_by or [table.c.created_at.desc()] if hasattr(table.c, "created_at") else []
+        keyset = keyset or cursor is not None
+
+        if keyset:
+            if order_by:
+                raise ValueError("order_by is not supported with keyset pagination")
+            key_cols = self.keyset_columns(table)
+            order_by = self.keyset_order_by(table)
+            offset = 0
+        else:
+            order_by = order_by or [table.c.created_at.desc()] if hasattr(table.c, "created_at") else []
 
         where_clause = sa.and_(*filters) if filters else sa.true()
         base_stmt = sa.select(table).where(where_clause)
 
+        if keyset and cursor:
+            base_stmt = base_stmt.where(self.keyset_after(table, decode_cursor(cursor)))
+
         if order_by:
             base_stmt = base_stmt.order_by(*order_by)
 
         count_stmt = sa.select(sa.func.count()).select_from(table).where(where_clause)
 
+        # The window would only count the rows after the cursor, so past the
+        # first keyset page the window strategy runs the count query instead.
+        window = total == TOTAL_WINDOW and not (keyset and cursor)
+        if window:
+            base_stmt = base_stmt.add_columns(sa.func.count().over().label("_total"))
+
+        # Read one extra row to know whether a next page exists.
+        page_stmt = base_stmt.limit(limit + 1)
+        if not keyset:
+            page_stmt = page_stmt.offset(offset)
+
+        keys = table.c.keys()
+        width = len(keys)
+        # Per-row JSON overhead: brackets and separators (plus `"key":` for dicts).
+        row_overhead = width + 2 if as_rows else sum(len(k) + 4 for k in keys) + 2
+
+        def load() -> Page:
+            log = logging.getLogger(__name__)
+            truncated = False
+            try:
+                with self._connect(schema) as conn:
+                    total_count: Optional[int] = None
+                    if total == TOTAL_EXACT or (total == TOTAL_WINDOW and not window):
+                        total_count = int(conn.execute(count_stmt).scalar() or 0)
+                    elif total == TOTAL_ESTIMATE:
+                        total_count = self._estimate_count(conn, table, schema, filters, count_stmt)
+                    if max_bytes is None:
+                        rows = conn.execute(page_stmt).all()
+                    else:
+                        # A page that fits one fetch is read buffered: a
+                        # server-side cursor would only add round trips.
+                        streamed = limit + 1 > BUDGET_FETCH_ROWS
+                        stmt = page_stmt.execution_options(yield_per=BUDGET_FETCH_ROWS) if streamed else page_stmt
+                        rows, truncated = _rows_within(conn.execute(stmt), limit, max_bytes, row_overhead, width)
+                    if window:
+                        if rows:
+                            total_count = int(rows[0][-1])
+                        elif offset:
+                            # Past the last page the window has nothing to report.
+                            total_count = int(conn.execute(count_stmt).scalar() or 0)
+                        else:
+                            total_count = 0
+            except Exception:
+                log.exception("DB query failed", extra={"limit": limit, "offset": offset, "total": total})
+                raise
+
+            has_more = truncated or len(rows) > limit
+            rows = rows[:limit]
+
+            if as_rows:
+                items = [tuple(r[:width]) for r in rows]
+            else:
+                # Index-based: the window strategy's trailing _total is ignored.
+                items = row_serializer(table).many(rows)
+
+            next_cursor = None
+            if keyset and has_more:
+                last = dict(zip(keys, rows[-1]))
+                next_cursor = encode_cursor(last[c.key] for c in key_cols)
+
+            return Page(
+                items=items,
+                total=total_count,
+                limit=limit,
+                offset=offset,
+                next_cursor=next_cursor,
+                has_more=has_more,
+                total_strategy=total,
+                columns=keys,
+                next_offset=offset + len(items) if has_more and not keyset else None,
+                truncated=truncated,
+            )
+
+        return self._cached(schema, table, page_stmt, ("list", total, as_rows, version, max_bytes), load)
+
+    def _estimate_count(
+        self,
+        conn: sa.Connection,
+        table: sa.Table,
+        schema: Optional[str],
+        filters: List[sa.ColumnElement[bool]],
+        count_stmt: sa.Select,
+    ) -> int:
+        """Planner row estimate; falls back to an exact count off PostgreSQL."""
+        if conn.dialect.name != "postgresql":
+            return int(conn.execute(count_stmt).scalar() or 0)
+
+        if not filters:
+            # reltuples is -1 for a table that was never vacuumed/analyzed.
+            reltuples = conn.execute(
+                sa.text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": self._qualified_name(conn, table, schema)},
+            ).scalar()
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+            return int(conn.execute(count_stmt).scalar() or 0)
+
+        select_stmt = sa.select(sa.literal(1)).select_from(table).where(sa.and_(*filters))
+        # exec_driver_sql bypasses schema_translate_map, so render the schema now.
+        compiled = select_stmt.compile(
+            dialect=conn.dialect,
+            schema_translate_map={None: schema} if schema else None,
+            render_schema_translate=True,
+        )
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _qualified_name(conn: sa.Connection, table: sa.Table, schema: Optional[str]) -> str:
+        preparer = conn.dialect.identifier_preparer
+        name = preparer.quote(table.name)
+        return f"{preparer.quote_schema(schema)}.{name}" if schema else name
+
+    def table_version(self, table: sa.Table, *, schema: Optional[str] = None) -> Optional[str]:
+        """Cheap change watermark of ``(schema, table)``, e.g. for ETags.
+
+        PostgreSQL: the table's generation counter in ``public.table_versions``
+        (a primary key lookup). The flyway trigger bumps it in the transaction
+        that writes the table, so it commits, and replicates, together with
+        the rows. ``None`` when the counter table or the table's row is missing
+        (schema not migrated): no watermark beats a stale one.
+
+        Other dialects: ``count(*)`` and ``max(created_at)``, which miss
+        in-place updates.
+
+        Read on the same connection as :meth:`list` (reader unless the request
+        has written); use :meth:`list_versioned` to tag a page with it. Equal
+        versions are the same on every process, so they can be compared
+        across containers.
+        """
+        if not self._has_versions():
+            return None
+        return self._read_version(table, schema)
+
+    def _has_versions(self) -> bool:
+        """Whether versions can be read: off PostgreSQL always, on it once the counter table exists.
+
+        Checked before a read connection is taken: a catalog refresh checks out
+        a writer connection of its own (an overflow connect with a pool of one).
+        """
+        return self.engine.dialect.name != "postgresql" or ("public", "table_versions") in self._catalog_snapshot()
+
+    def _read_version(self, table: sa.Table, schema: Optional[str]) -> Optional[str]:
+        with self._connect(schema) as conn:
+            if conn.dialect.name == "postgresql":
+                stmt = sa.select(TABLE_VERSIONS.c.version).where(
+                    TABLE_VERSIONS.c.schema_name == (schema or conn.dialect.default_schema_name),
+                    TABLE_VERSIONS.c.table_name == table.name,
+                )
+            else:
+                max_created = (
+                    sa.select(sa.func.max(table.c.created_at)).scalar_subquery()
+                    if "created_at" in table.c
+                    else sa.null()
+                )
+                stmt = sa.select(sa.func.count(), max_created).select_from(table)
+            row = conn.execute(stmt).first()
+        if row is None:
+            return None
+        return hashlib.sha256(repr(tuple(row)).encode("utf-8")).hexdigest()[:20]
+
+    def list_versioned(
+        self,
+        table: sa.Table,
+        *,
+        schema: Optional[str] = None,
+        unchanged: Callable[[str], bool] = lambda version: False,
+        **kwargs: Any,
+    ) -> Tuple[Optional[str], Optional[Page]]:
+        """:meth:`table_version`, then the :meth:`list` page tagged with it.
+
+        Both are read on one connection, version first: the page can only be
+        newer than its version (the client refetches), never older, even
+        behind a load-balanced replica endpoint. Returns ``(version, None)``
+        without reading the page when ``unchanged(version)`` is true (an
+        ``If-None-Match`` hit). ``kwargs`` are passed to :meth:`list`.
+        """
+        if not self._has_versions():
+            return None, self.list(table, schema=schema, **kwargs)
+        with self._pinned(schema):
+            version = self._read_version(table, schema)
+            if version is not None and unchanged(version):
+                return version, None
+            return version, self.list(table, schema=schema, version=version, **kwargs)
+
+    @staticmethod
+    def select_stmt(
+        table: sa.Table,
+        *,
+        filters: Optional[Iterable[sa.ColumnElement[bool]]] = None,
+        order_by: Optional[List[sa.ClauseElement]] = None,
+    ) -> sa.Select:
+        filters = list(filters or [])
+        stmt = sa.select(table)
+        if filters:
+            stmt = stmt.where(sa.and_(*filters))
+        if order_by:
+            stmt = stmt.order_by(*order_by)
+        return stmt
+
+    def iter_rows(
+        self,
+        table: sa.Table,
+        *,
+        schema: Optional[str] = None,
+        filters: Optional[Iterable[sa.ColumnElement[bool]]] = None,
+        order_by: Optional[List[sa.ClauseElement]] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[sa.Row]:
+        """Stream every matching row with a server-side cursor.
+
+        Rows are yielded as ``sa.Row`` tuples in ``table.c`` order, ``chunk_size``
+        at a time from the driver, so memory stays constant regardless of the
+        result size. The connection is held until the generator is exhausted
+        or closed.
+        """
+        stmt = self.select_stmt(table, filters=filters, order_by=order_by)
+
         log = logging.getLogger(__name__)
-        try:
-            with self.engine.connect() as conn:
-                total = int(conn.execute(count_stmt).scalar() or 0)
-                rows = conn.execute(base_stmt.limit(limit).offset(offset)).mappings().all()
-        except Exception:
-            log.exception("DB query failed", extra={"limit": limit, "offset": offset})
-            raise
+        with self._connect(schema) as conn:
+            try:
+                result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+            except Exception:
+                log.exception("DB streaming query failed", extra={"chunk_size": chunk_size})
+                raise
+            yield from result
 
-        return Page(items=[dict(r) for r in rows], total=total, limit=limit, offset=offset)
+    def get_by_id(self, table: sa.Table, id_value: Any, *, schema: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        stmt = sa.select(table).where(_pk_column(table) == id_value)
 
-    def get_by_id(self, table: sa.Table, id_value: Any) -> Optional[Dict[str, Any]]:
-        pk = list(table.primary_key.columns)
-        if len(pk) != 1:
-            raise ValueError("Table must have exactly one primary key column")
-        stmt = sa.select(table).where(pk[0] == id_value)
-        with self.engine.connect() as conn:
-            row = conn.execute(stmt).mappings().first()
-        return dict(row) if row else None
+        def load() -> Optional[Dict[str, Any]]:
+            with self._connect(schema) as conn:
+                row = conn.execute(stmt).first()
+            return row_serializer(table).to_dict(row) if row else None
+
+        return self._cached(schema, table, stmt, "get", load)
 
-    def create(self, table: sa.Table, data: Dict[str, Any]) -> Dict[str, Any]:
+    def get_many(
+        self,
+        table: sa.Table,
+        ids: Iterable[Any],
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Fetch rows by primary key with one ``IN`` query per ``batch_size`` ids.
+
+        Returns one entry per input id, in input order (``None`` when missing).
+        """
+        pk = _pk_column(table)
+        normalize = _key_normalizer(pk)
+        keys = [normalize(v) for v in ids]
+        unique = list(dict.fromkeys(keys))
+
+        to_dict = row_serializer(table).to_dict
+        pk_index = list(table.c).index(pk)
+        found: Dict[Any, Dict[str, Any]] = {}
+        with self._connect(schema) as conn:
+            for start in range(0, len(unique), batch_size):
+                stmt = sa.select(table).where(pk.in_(unique[start:start + batch_size]))
+                for row in conn.execute(stmt):
+                    found[normalize(row[pk_index])] = to_dict(row)
+        return [found.get(k) for k in keys]
+
+    def create(self, table: sa.Table, data: Dict[str, Any], *, schema: Optional[str] = None) -> Dict[str, Any]:
         stmt = table.insert().values(**data).returning(*table.c)
-        with self.engine.begin() as conn:
-            row = conn.execute(stmt).mappings().first()
+        with self._begin(schema) as conn:
+            row = conn.execute(stmt).first()
+        self._invalidate(schema, table)
         if not row:
             raise RuntimeError("Insert failed")
-        return dict(row)
+        return row_serializer(table).to_dict(row)
 
-    def update(self, table: sa.Table, id_value: Any, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        pk = list(table.primary_key.columns)
-        if len(pk) != 1:
-            raise ValueError("Table must have exactly one primary key column")
+    def update(
+        self, table: sa.Table, id_value: Any, data: Dict[str, Any], *, schema: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
         stmt = (
             table.update()
-            .where(pk[0] == id_value)
+            .where(_pk_column(table) == id_value)
             .values(**data)
             .returning(*table.c)
         )
-        with self.engine.begin() as conn:
-            row = conn.execute(stmt).mappings().first()
-        return dict(row) if row else None
+        with self._begin(schema) as conn:
+            row = conn.execute(stmt).first()
+        self._invalidate(schema, table)
+        return row_serializer(table).to_dict(row) if row else None
 
-    def delete(self, table: sa.Table, id_value: Any) -> bool:
-        pk = list(table.primary_key.columns)
-        if len(pk) != 1:
-            raise ValueError("Table must have exactly one primary key column")
-        stmt = table.delete().where(pk[0] == id_value)
-        with self.engine.begin() as conn:
+    def delete(self, table: sa.Table, id_value: Any, *, schema: Optional[str] = None) -> bool:
+        stmt = table.delete().where(_pk_column(table) == id_value)
+        with self._begin(schema) as conn:
             res = conn.execute(stmt)
+        self._invalidate(schema, table)
         return (res.rowcount or 0) > 0
+
+    # ------------------------------------------------------------------
+    # Bulk operations
+    #
+    # Each call runs in a single transaction; rows are sent in batches of
+    # ``batch_size`` using executemany / multi-row VALUES instead of one
+    # statement (and one commit) per row.
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _returning_columns(table: sa.Table, pk: sa.Column, returning: str) -> List[sa.Column]:
+        if returning not in RETURNING_MODES:
+            raise ValueError(f"invalid returning mode: {returning}")
+        if returning == RETURN_ROWS:
+            return list(table.c)
+        if returning == RETURN_KEYS:
+            return [pk]
+        return []
+
+    @staticmethod
+    def _collect(result: sa.CursorResult, table: sa.Table, returning: str, items: List[Any]) -> None:
+        if returning == RETURN_ROWS:
+            items.extend(row_serializer(table).many(result))
+        elif returning == RETURN_KEYS:
+            items.extend(result.scalars())
+
+    def _dialect_insert(self, table: sa.Table):
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise ValueError(f"upsert is not supported for dialect {dialect}")
+        return insert(table)
+
+    def create_many(
+        self,
+        table: sa.Table,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        returning: str = RETURN_NONE,
+    ) -> BulkResult:
+        """Insert ``rows``. ``returning`` is ``none``, ``keys`` or ``rows``."""
+        pk = _pk_column(table)
+        ret_cols = self._returning_columns(table, pk, returning)
+        stmt = table.insert()
+        if ret_cols:
+            stmt = stmt.returning(*ret_cols, sort_by_parameter_order=True)
+
+        count, items = 0, []
+        with self._begin(schema) as conn:
+            for batch in _batches(rows, batch_size):
+                res = conn.execute(stmt, batch)
+                count += len(batch)
+                self._collect(res, table, returning, items)
+        self._invalidate(schema, table)
+        return BulkResult(count=count, items=items)
+
+    def upsert_many(
+        self,
+        table: sa.Table,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        returning: str = RETURN_NONE,
+    ) -> BulkResult:
+        """Insert ``rows`` or update them on primary key conflict (``ON CONFLICT``)."""
+        pk = _pk_column(table)
+        ret_cols = self._returning_columns(table, pk, returning)
+
+        count, items = 0, []
+        with self._begin(schema) as conn:
+            for batch in _batches(rows, batch_size):
+                if pk.key not in batch[0]:
+                    raise ValueError(f"upsert rows must include the primary key: {pk.key}")
+                stmt = self._dialect_insert(table)
+                update_cols = {k: stmt.excluded[k] for k in batch[0] if k != pk.key}
+                if update_cols:
+                    stmt = stmt.on_conflict_do_update(index_elements=[pk], set_=update_cols)
+                else:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=[pk])
+                if ret_cols:
+                    stmt = stmt.returning(*ret_cols, sort_by_parameter_order=True)
+                res = conn.execute(stmt, batch)
+                count += len(batch)
+                self._collect(res, table, returning, items)
+        self._invalidate(schema, table)
+        return BulkResult(count=count, items=items)
+
+    def update_many(
+        self,
+        table: sa.Table,
+        rows: Iterable[Dict[str, Any]],
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> BulkResult:
+        """Update rows by primary key; each row must contain the primary key.
+
+        PostgreSQL: one ``UPDATE ... FROM (VALUES ...)`` per batch of rows
+        sharing the same keys (when a key repeats in a batch, its last row
+        wins). Other dialects: executemany, one statement per row.
+
+        ``BulkResult.count`` is the number of rows matched. Rows are not
+        returned.
+        """
+        pk = _pk_column(table)
+        # A prefix no column key starts with.
+        prefix = "b_"
+        while any(k.startswith(prefix) for k in table.c.keys()):
+            prefix = "b" + prefix
+        from_values = self.engine.dialect.name == "postgresql"
+
+        count = 0
+        with self._begin(schema) as conn:
+            for batch in _batches(rows, batch_size):
+                if pk.key not in batch[0]:
+                    raise ValueError(f"update rows must include the primary key: {pk.key}")
+                # Bound names / VALUES columns must not clash with column names
+                # in the SET clause or with each other: built from the column position.
+                names = {k: f"{prefix}{i}" for i, k in enumerate(batch[0]) if k != pk.key}
+                names[pk.key] = f"{prefix}pk"
+                if len(names) == 1:
+                    continue
+                if from_values:
+                    stmt = self._update_from_values(table, pk, names, batch)
+                    res = conn.execute(stmt)
+                else:
+                    values = {k: sa.bindparam(names[k]) for k in names if k != pk.key}
+                    stmt = table.update().where(pk == sa.bindparam(names[pk.key])).values(values)
+                    params = [{names[k]: v for k, v in row.items()} for row in batch]
+                    res = conn.execute(stmt, params)
+                count += res.rowcount or 0
+        self._invalidate(schema, table)
+        return BulkResult(count=count, items=[])
+
+    @staticmethod
+    def _update_from_values(
+        table: sa.Table, pk: sa.Column, names: Dict[str, str], batch: List[Dict[str, Any]]
+    ) -> sa.Update:
+        """``UPDATE table SET ... FROM (VALUES ...) AS v WHERE table.pk = v.pk`` for one batch."""
+        keys = list(names)
+        # Last row per key, as executemany would leave it.
+        latest = {row[pk.key]: row for row in batch}
+        v = sa.values(*(sa.column(names[k], table.c[k].type) for k in keys), name="v").data(
+            [tuple(row[k] for k in keys) for row in latest.values()]
+        )
+        # VALUES columns are typed from their literals: cast back to the column types.
+        cols = {k: sa.cast(v.c[names[k]], table.c[k].type) for k in keys}
+        return table.update().where(pk == cols[pk.key]).values({k: cols[k] for k in keys if k != pk.key})
+
+    def delete_many(
+        self,
+        table: sa.Table,
+        ids: Iterable[Any],
+        *,
+        schema: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        returning: str = RETURN_NONE,
+    ) -> BulkResult:
+        """Delete rows by primary key. ``returning`` is ``none`` or ``keys``."""
+        pk = _pk_column(table)
+        if returning == RETURN_ROWS:
+            raise ValueError("delete_many supports returning 'none' or 'keys'")
+        ret_cols = self._returning_columns(table, pk, returning)
+
+        ids = list(ids)
+        count, items = 0, []
+        with self._begin(schema) as conn:
+            for start in range(0, len(ids), batch_size):
+                stmt = table.delete().where(pk.in_(ids[start:start + batch_size]))
+                if ret_cols:
+                    stmt = stmt.returning(*ret_cols)
+                res = conn.execute(stmt)
+                if ret_cols:
+                    deleted = list(res.scalars())
+                    count += len(deleted)
+                    items.extend(deleted)
+                else:
+                    count += res.rowcount or 0
+        self._invalidate(schema, table)
+        return BulkResult(count=count, items=items)
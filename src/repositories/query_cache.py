@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""Read-through cache for repository query results.
+
+Entries are keyed on ``(schema, table, generation, statement)``. Every write
+through the repository bumps the table's *generation*, so older entries are
+never read again and simply age out (TTL + size-bounded LRU). Identical
+concurrent loads are coalesced (single-flight): one caller queries the
+database, the others wait for its result.
+
+The storage is pluggable through :class:`QueryCacheBackend`. The in-process
+backend only sees writes made by its own process; a shared backend (e.g.
+Redis/ElastiCache) can implement the same four methods to share entries and
+generations between containers.
+
+Cached values are shared between callers and must be treated as read-only.
+
+Env vars:
+- ``QUERY_CACHE_TTL``: seconds; ``0``/unset disables the cache.
+- ``QUERY_CACHE_SIZE``: max entries of the in-process backend (default 1024).
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import hashlib
+import os
+import threading
+
+from ..common.ttl_cache import TTLCache
+
+Namespace = Tuple[Optional[str], str]
+
+
+class QueryCacheBackend:
+    """Storage interface for :class:`QueryCache`."""
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or ``None``."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def get_generation(self, namespace: str) -> int:
+        raise NotImplementedError
+
+    def bump_generation(self, namespace: str) -> int:
+        raise NotImplementedError
+
+
+class InProcessQueryCacheBackend(QueryCacheBackend):
+    def __init__(self, maxsize: int = 1024):
+        self._entries = TTLCache(maxsize=maxsize)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    def get_generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace: str) -> int:
+        with self._lock:
+            gen = self._generations.get(namespace, 0) + 1
+            self._generations[namespace] = gen
+            return gen
+
+    def stats(self) -> Dict[str, int]:
+        return self._entries.stats()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class QueryCache:
+    def __init__(self, backend: Optional[QueryCacheBackend] = None, ttl: float = 30.0):
+        self.backend = backend or InProcessQueryCacheBackend()
+        self.ttl = ttl
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["QueryCache"]:
+        ttl = float(os.getenv("QUERY_CACHE_TTL", "0") or 0)
+        if ttl <= 0:
+            return None
+        backend = InProcessQueryCacheBackend(maxsize=int(os.getenv("QUERY_CACHE_SIZE", "1024")))
+        return cls(backend=backend, ttl=ttl)
+
+    @staticmethod
+    def _namespace(namespace: Namespace) -> str:
+        schema, table = namespace
+        return f"{schema or ''}.{table}"
+
+    def key_for(self, namespace: Namespace, parts: Hashable) -> str:
+        ns = self._namespace(namespace)
+        gen = self.backend.get_generation(ns)
+        digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+        return f"{ns}:{gen}:{digest}"
+
+    def get_or_load(self, namespace: Namespace, parts: Hashable, loader: Callable[[], Any]) -> Any:
+        key = self.key_for(namespace, parts)
+        value = self.backend.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            if flight.value is not None:
+                self.backend.set(key, flight.value, self.ttl)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, namespace: Namespace) -> None:
+        """Make every cached result of ``namespace`` unreachable."""
+        self.backend.bump_generation(self._namespace(namespace))
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"coalesced": self.coalesced}
+        if isinstance(self.backend, InProcessQueryCacheBackend):
+            stats.update(self.backend.stats())
+        return stats
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+"""Schema-agnostic cache of reflected table shapes.
+
+Every tenant schema has the same tables (they come from the same Flyway
+migrations), so each table is reflected once and stored *without* a schema.
+Queries pick the tenant at execution time through
+``execution_options(schema_translate_map={None: schema})``; because every
+tenant shares the same ``Table`` object, SQLAlchemy's compiled-statement cache
+also hits across tenants.
+
+The shapes can be pickled to a file (bundled in the deployment artifact or
+written to ``/tmp``) and loaded at init, so a Lambda cold start does not have to
+query the catalog. A file is only used when its version matches
+:func:`cache_version`.
+
+Env vars:
+- ``DB_REFLECTION_CACHE``: read-only file bundled with the artifact (optional).
+- ``DB_REFLECTION_CACHE_TMP``: writable file (default ``/tmp/db_reflection_cache.pickle``,
+  empty string disables it).
+- ``DB_SCHEMA_VERSION``: bump when migrations change table shapes.
+"""
+
+from typing import Dict, Optional
+import logging
+import os
+import pickle
+import threading
+
+import sqlalchemy as sa
+
+REFLECTION_CACHE_FORMAT = 1
+DEFAULT_TMP_PATH = "/tmp/db_reflection_cache.pickle"
+
+
+def cache_version() -> str:
+    return f"{REFLECTION_CACHE_FORMAT}:{sa.__version__}:{os.getenv('DB_SCHEMA_VERSION', '')}"
+
+
+class ReflectionCache:
+    def __init__(self, bundled_path: Optional[str] = None, tmp_path: Optional[str] = None):
+        self.bundled_path = bundled_path if bundled_path is not None else os.getenv("DB_REFLECTION_CACHE", "")
+        self.tmp_path = tmp_path if tmp_path is not None else os.getenv("DB_REFLECTION_CACHE_TMP", DEFAULT_TMP_PATH)
+        self.metadata = sa.MetaData()
+        self._lock = threading.Lock()
+        self._log = logging.getLogger(__name__)
+
+    def get(self, table_name: str) -> Optional[sa.Table]:
+        return self.metadata.tables.get(table_name)
+
+    def add(self, reflected: sa.Table) -> sa.Table:
+        """Store a schema-less copy of ``reflected`` and return it."""
+        with self._lock:
+            existing = self.metadata.tables.get(reflected.name)
+            if existing is not None:
+                return existing
+            return reflected.to_metadata(self.metadata, schema=None)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """Load shapes from the bundled file, then ``/tmp``. Returns the number of tables loaded."""
+        loaded = 0
+        for path in (self.bundled_path, self.tmp_path):
+            if path:
+                loaded += self._load_file(path)
+        return loaded
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.tmp_path
+        if not path:
+            return
+        with self._lock:
+            payload = pickle.dumps({"version": cache_version(), "metadata": self.metadata})
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError:
+            self._log.warning("Failed to write reflection cache", extra={"path": path}, exc_info=True)
+
+    def _load_file(self, path: str) -> int:
+        try:
+            with open(path, "rb") as f:
+                # Only files produced by save() (deployment artifact or our own /tmp).
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception:
+            self._log.warning("Ignoring unreadable reflection cache", extra={"path": path}, exc_info=True)
+            return 0
+
+        if not isinstance(data, dict) or data.get("version") != cache_version():
+            self._log.info("Ignoring stale reflection cache", extra={"path": path})
+            return 0
+
+        loaded = 0
+        for table in data["metadata"].tables.values():
+            if self.get(table.name) is None:
+                self.add(table)
+                loaded += 1
+        return loaded
+
+    def tables(self) -> Dict[str, sa.Table]:
+        return dict(self.metadata.tables)
@@ -1,4 +1,9 @@
+from ..common.row_serializers import attribute_serializer
+
+
 class DocumentTypeViewResponse():
+    FIELDS = ("id", "company_id", "name", "extension", "workflow_id")
+
     def __init__(self, id, company_id, name, extension, workflow_id):
         self.id = id
         self.company_id = company_id
@@ -7,5 +12,10 @@ class DocumentTypeViewResponse():
         self.workflow_id = workflow_id
 
     def serialize(self):
-        return {c.name: str(getattr(self, c.name))
-            for c in self.columns}
+        return _serialize(self)
+
+
+# Compiled once: {field: str(value)} without a per-call getattr loop.
+_serialize = attribute_serializer(
+    DocumentTypeViewResponse.FIELDS, convert=lambda v: None if v is None else str(v)
+)
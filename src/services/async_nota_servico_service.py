@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+import sqlalchemy as sa
+
+from ..common.conexao_banco_async import get_async_engine, get_async_reader_engine
+from ..repositories.async_generic_crud_repository import AsyncGenericCrudRepository
+from ..repositories.generic_crud_repository import Page, TOTAL_EXACT
+from .nota_servico_service import SCHEMA_REGEX, NotaServicoService
+
+
+class AsyncNotaServicoService:
+    """asyncio counterpart of :class:`NotaServicoService` (ASGI path)."""
+
+    TABLE_NAME = NotaServicoService.TABLE_NAME
+
+    def __init__(self, repo: Optional[AsyncGenericCrudRepository] = None):
+        self.repo = repo or AsyncGenericCrudRepository(
+            get_async_engine(),
+            reader_engine=get_async_reader_engine(),
+        )
+        self._log = logging.getLogger(__name__)
+
+    async def _get_table(self, schema: str) -> sa.Table:
+        # 🔐 Security: validate schema name
+        if not SCHEMA_REGEX.match(schema):
+            raise ValueError(f"invalid schema name: {schema}")
+
+        try:
+            return await self.repo.get_table(table_name=self.TABLE_NAME, schema=schema)
+        except sa.exc.NoSuchTableError:
+            raise
+        except Exception:
+            self._log.exception("Failed reflecting table", extra={"schema": schema, "table": self.TABLE_NAME})
+            raise
+
+    async def list(
+        self,
+        schema: str,
+        limit: int = 50,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        total: str = TOTAL_EXACT,
+        max_bytes: Optional[int] = None,
+    ) -> Page:
+        """
+        List records from nota_servico in a dynamic schema (see ``NotaServicoService.list``).
+        """
+        max_bytes = NotaServicoService._page_budget(limit, offset, max_bytes)
+        table = await self._get_table(schema)
+        where_filters = NotaServicoService._where_filters(table, filters)
+
+        try:
+            return await self.repo.list(
+                table,
+                schema=schema,
+                filters=where_filters,
+                limit=limit,
+                offset=offset,
+                keyset=cursor is not None,
+                cursor=cursor or None,
+                total=total,
+                max_bytes=max_bytes,
+            )
+        except Exception:
+            self._log.exception(
+                "DB query failed",
+                extra={"schema": schema, "table": self.TABLE_NAME, "limit": limit, "offset": offset},
+            )
+            raise
+
+    async def list_versioned(
+        self,
+        schema: str,
+        unchanged: Callable[[str], bool],
+        limit: int = 50,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        total: str = TOTAL_EXACT,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[str], Optional[Page]]:
+        """
+        :meth:`list` tagged with the table's :meth:`version` (see ``NotaServicoService.list_versioned``).
+        """
+        max_bytes = NotaServicoService._page_budget(limit, offset, max_bytes)
+        table = await self._get_table(schema)
+        where_filters = NotaServicoService._where_filters(table, filters)
+
+        try:
+            return await self.repo.list_versioned(
+                table,
+                unchanged=unchanged,
+                schema=schema,
+                filters=where_filters,
+                limit=limit,
+                offset=offset,
+                keyset=cursor is not None,
+                cursor=cursor or None,
+                total=total,
+                max_bytes=max_bytes,
+            )
+        except Exception:
+            self._log.exception(
+                "DB query failed",
+                extra={"schema": schema, "table": self.TABLE_NAME, "limit": limit, "offset": offset},
+            )
+            raise
+
+    async def version(self, schema: str) -> Optional[str]:
+        """Change watermark of nota_servico in ``schema`` (see ``NotaServicoService.version``)."""
+        table = await self._get_table(schema)
+        return await self.repo.table_version(table, schema=schema)
+
+    async def get_many(self, schema: str, ids: Iterable[Any]) -> List[Optional[Dict[str, Any]]]:
+        table = await self._get_table(schema)
+        return await self.repo.get_many(table, ids, schema=schema)
+
+    async def export(
+        self,
+        schema: str,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 1000,
+    ) -> Tuple[List[str], AsyncIterator[sa.Row]]:
+        """
+        Stream every nota_servico row of a schema (async server-side cursor).
+        """
+        table = await self._get_table(schema)
+        where_filters = NotaServicoService._where_filters(table, filters)
+        order_by = self.repo.keyset_order_by(table)
+        rows = self.repo.iter_rows(
+            table, schema=schema, filters=where_filters, order_by=order_by, chunk_size=chunk_size
+        )
+        return table.c.keys(), rows
@@ -1,61 +1,271 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import os
 import re
 import logging
 
 import sqlalchemy as sa
 
-from ..common.conexao_banco import get_engine
-from ..repositories.generic_crud_repository import GenericCrudRepository, Page
+from ..common.conexao_banco import get_engine, get_reader_engine
+from ..repositories.batch_loader import BatchLoader
+from ..repositories.query_cache import QueryCache
+from ..repositories.generic_crud_repository import (
+    BulkResult,
+    GenericCrudRepository,
+    Page,
+    RETURN_NONE,
+    TOTAL_EXACT,
+)
 
 
 SCHEMA_REGEX = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+# Hard limits of the list endpoint: rows per page, and the byte budget of a
+# page (estimated JSON size; a client's `max_bytes` can only lower it). The
+# default leaves room under the 6 MB Lambda response limit.
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+LIST_MAX_BYTES = int(os.getenv("LIST_MAX_BYTES", str(4 * 1024 * 1024)))
+
 
 class NotaServicoService:
     TABLE_NAME = "nota_servico"
 
     def __init__(self, repo: Optional[GenericCrudRepository] = None):
         engine = get_engine()
-        self.repo = repo or GenericCrudRepository(engine)
+        self.repo = repo or GenericCrudRepository(
+            engine,
+            reader_engine=get_reader_engine(),
+            query_cache=QueryCache.from_env(),
+        )
         self._log = logging.getLogger(__name__)
 
-    def list(
-        self,
-        schema: str,
-        limit: int = 50,
-        offset: int = 0,
-        filters: Optional[Dict[str, Any]] = None,
-    ) -> Page:
-        """
-        List records from nota_servico in a dynamic schema.
-        """
-
+    def _get_table(self, schema: str) -> sa.Table:
         # 🔐 Security: validate schema name
         if not SCHEMA_REGEX.match(schema):
             raise ValueError(f"invalid schema name: {schema}")
 
         # Reflect table dynamically
         try:
-            table = self.repo.get_table(table_name=self.TABLE_NAME, schema=schema)
+            return self.repo.get_table(table_name=self.TABLE_NAME, schema=schema)
+        except sa.exc.NoSuchTableError:
+            # Unknown tenant: already logged (once per TTL) by the repository.
+            raise
         except Exception:
             self._log.exception("Failed reflecting table", extra={"schema": schema, "table": self.TABLE_NAME})
             raise
 
+    @staticmethod
+    def _validate_rows(table: sa.Table, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rows = list(rows)
+        for row in rows:
+            if not isinstance(row, dict):
+                raise ValueError("each item must be an object")
+            for key in row:
+                if key not in table.c:
+                    raise ValueError(f"invalid column: {key}")
+        return rows
+
+    @staticmethod
+    def _page_budget(limit: int, offset: int, max_bytes: Optional[int]) -> int:
+        """Validate the page parameters against the hard limits; return the byte budget."""
+        if not 1 <= limit <= LIST_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {LIST_MAX_LIMIT}")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        if max_bytes is None:
+            return LIST_MAX_BYTES
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        return min(max_bytes, LIST_MAX_BYTES)
+
+    @staticmethod
+    def _where_filters(table: sa.Table, filters: Optional[Dict[str, Any]]) -> List[sa.ColumnElement[bool]]:
         # Build WHERE filters safely
         where_filters = []
         for key, value in (filters or {}).items():
             if key not in table.c:
                 raise ValueError(f"invalid filter column: {key}")
             where_filters.append(table.c[key] == value)
+        return where_filters
+
+    def list(
+        self,
+        schema: str,
+        limit: int = 50,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        total: str = TOTAL_EXACT,
+        as_rows: bool = False,
+        version: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Page:
+        """
+        List records from nota_servico in a dynamic schema.
+
+        Pass ``cursor`` (``""`` for the first page) to use keyset pagination;
+        the next page is requested with ``Page.next_cursor``. ``total`` picks the
+        count strategy (``exact``, ``window``, ``estimate`` or ``none``).
+        ``as_rows`` returns value tuples (``Page.columns`` order) instead of dicts.
+        ``version`` is the :meth:`version` the response is tagged with.
+
+        ``limit`` must be within ``LIST_MAX_LIMIT`` and the page is cut at
+        ``max_bytes`` (at most ``LIST_MAX_BYTES``); a cut page has
+        ``Page.truncated`` set and continues at ``next_cursor`` / ``next_offset``.
+        """
+        table, query = self._list_query(schema, limit, offset, filters, cursor, total, max_bytes)
 
         # Delegate to repository
         try:
-            return self.repo.list(table, filters=where_filters, limit=limit, offset=offset)
+            return self.repo.list(table, as_rows=as_rows, version=version, **query)
+        except Exception:
+            self._log.exception(
+                "DB query failed",
+                extra={"schema": schema, "table": self.TABLE_NAME, "limit": limit, "offset": offset},
+            )
+            raise
+
+    def list_versioned(
+        self,
+        schema: str,
+        unchanged: Callable[[str], bool],
+        limit: int = 50,
+        offset: int = 0,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        total: str = TOTAL_EXACT,
+        as_rows: bool = False,
+        max_bytes: Optional[int] = None,
+    ) -> Tuple[Optional[str], Optional[Page]]:
+        """
+        :meth:`list` tagged with the table's :meth:`version`, both read on one
+        connection (see ``GenericCrudRepository.list_versioned``). Returns
+        ``(version, None)`` without reading the page when ``unchanged(version)``.
+        """
+        table, query = self._list_query(schema, limit, offset, filters, cursor, total, max_bytes)
+        try:
+            return self.repo.list_versioned(table, unchanged=unchanged, as_rows=as_rows, **query)
         except Exception:
             self._log.exception(
                 "DB query failed",
                 extra={"schema": schema, "table": self.TABLE_NAME, "limit": limit, "offset": offset},
             )
             raise
+
+    def _list_query(
+        self,
+        schema: str,
+        limit: int,
+        offset: int,
+        filters: Optional[Dict[str, Any]],
+        cursor: Optional[str],
+        total: str,
+        max_bytes: Optional[int],
+    ) -> Tuple[sa.Table, Dict[str, Any]]:
+        """Validate the list parameters; return the table and the repository ``list`` arguments."""
+        max_bytes = self._page_budget(limit, offset, max_bytes)
+        table = self._get_table(schema)
+        return table, {
+            "schema": schema,
+            "filters": self._where_filters(table, filters),
+            "limit": limit,
+            "offset": offset,
+            "keyset": cursor is not None,
+            "cursor": cursor or None,
+            "total": total,
+            "max_bytes": max_bytes,
+        }
+
+    def version(self, schema: str) -> Optional[str]:
+        """
+        Change watermark of nota_servico in ``schema``: equal values mean the
+        table has not changed (see ``GenericCrudRepository.table_version``).
+        """
+        table = self._get_table(schema)
+        try:
+            return self.repo.table_version(table, schema=schema)
+        except Exception:
+            self._log.exception("DB version query failed", extra={"schema": schema, "table": self.TABLE_NAME})
+            raise
+
+    def export(
+        self,
+        schema: str,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: int = 1000,
+    ) -> Tuple[List[str], Iterator[sa.Row]]:
+        """
+        Stream every nota_servico row of a schema.
+
+        Returns the column names and a lazy row iterator; the query runs (on a
+        server-side cursor) when the iterator is first consumed.
+        """
+        table = self._get_table(schema)
+        where_filters = self._where_filters(table, filters)
+        order_by = self.repo.keyset_order_by(table)
+        rows = self.repo.iter_rows(
+            table, schema=schema, filters=where_filters, order_by=order_by, chunk_size=chunk_size
+        )
+        return table.c.keys(), rows
+
+    def get_many(self, schema: str, ids: Iterable[Any]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch rows by id with one query; results follow the input order."""
+        table = self._get_table(schema)
+        try:
+            return self.repo.get_many(table, ids, schema=schema)
+        except Exception:
+            self._log.exception("DB query failed", extra={"schema": schema, "table": self.TABLE_NAME})
+            raise
+
+    def loader(self, schema: str) -> BatchLoader:
+        """
+        Batch loader for id lookups in ``schema``, shared for the current Flask request.
+
+        Outside a request a new loader is returned on every call.
+        """
+        table = self._get_table(schema)
+        try:
+            from flask import g, has_app_context
+        except ImportError:  # pragma: no cover - services used without Flask
+            return BatchLoader(self.repo, table, schema=schema)
+        if not has_app_context():
+            return BatchLoader(self.repo, table, schema=schema)
+
+        loaders = g.setdefault("nota_servico_loaders", {})
+        if schema not in loaders:
+            loaders[schema] = BatchLoader(self.repo, table, schema=schema)
+        return loaders[schema]
+
+    # ------------------------------------------------------------------
+    # Bulk operations
+    # ------------------------------------------------------------------
+
+    def create_many(self, schema: str, rows: Iterable[Dict[str, Any]], returning: str = RETURN_NONE) -> BulkResult:
+        table = self._get_table(schema)
+        return self._bulk("create_many", schema, self.repo.create_many, table,
+                          self._validate_rows(table, rows), returning=returning)
+
+    def upsert_many(self, schema: str, rows: Iterable[Dict[str, Any]], returning: str = RETURN_NONE) -> BulkResult:
+        table = self._get_table(schema)
+        return self._bulk("upsert_many", schema, self.repo.upsert_many, table,
+                          self._validate_rows(table, rows), returning=returning)
+
+    def update_many(self, schema: str, rows: Iterable[Dict[str, Any]]) -> BulkResult:
+        table = self._get_table(schema)
+        return self._bulk("update_many", schema, self.repo.update_many, table,
+                          self._validate_rows(table, rows))
+
+    def delete_many(self, schema: str, ids: Iterable[Any], returning: str = RETURN_NONE) -> BulkResult:
+        table = self._get_table(schema)
+        return self._bulk("delete_many", schema, self.repo.delete_many, table, list(ids), returning=returning)
+
+    def _bulk(self, op: str, schema: str, fn, table: sa.Table, items: List[Any], **kwargs) -> BulkResult:
+        try:
+            return fn(table, items, schema=schema, **kwargs)
+        except Exception:
+            self._log.exception(
+                "DB bulk operation failed",
+                extra={"schema": schema, "table": self.TABLE_NAME, "op": op, "items": len(items)},
+            )
+            raise